@@ -1,41 +1,1487 @@
-from collections import OrderedDict
-from functools import wraps
-from typing import Callable, Any, Tuple, Mapping, Optional
+import asyncio
+import atexit
+import hashlib
+import inspect
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
 import unittest.mock
+import zlib
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import partial, wraps
+from multiprocessing import shared_memory
+from typing import Any, Callable, Mapping, Optional, Tuple
 
-KeyType = Tuple[Any, ...]
+KeyType = Any
 
-def make_key(args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> KeyType:
-    if not kwargs:
-        return args
-    return args + tuple(sorted(kwargs.items()))
+_MISSING = object()
 
-def lru_cache(func: Optional[Callable] = None, *, maxsize: int = 128):
-    if not isinstance(maxsize, int) or maxsize < 0:
-        raise TypeError("'maxsize' must be a non-negative int")
+CacheInfo = namedtuple(
+    "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+)
+
+# Времена в секундах; histogram — {верхняя граница в нс: число промахов}
+CacheStats = namedtuple(
+    "CacheStats",
+    [
+        "hits",
+        "misses",
+        "evictions",
+        "hit_ratio",
+        "miss_time",
+        "mean_miss_time",
+        "time_saved",
+        "histogram",
+    ],
+)
+
+
+class _HashedSeq(list):
+    # Ключ, который хэшируется один раз: словарь кэша спрашивает hash
+    # при каждом обращении, а для кортежа он каждый раз пересчитывается.
+    # Создание такого объекта в чистом Python дороже, чем пара хэшей
+    # короткого кортежа, поэтому оборачиваются только длинные ключи.
+    __slots__ = ("hashvalue",)
+
+    def __init__(self, tup: Tuple[Any, ...]) -> None:
+        self[:] = tup
+        self.hashvalue = hash(tup)
+
+    def __hash__(self) -> int:
+        return self.hashvalue
+
+
+class _KwdMark:
+    # Разделитель позиционных и именованных аргументов: без него f(1, ("c", 3))
+    # и f(1, c=3) получили бы один ключ. Из pickle возвращается тот же
+    # объект, поэтому ключи с kwargs переживают дисковый кэш.
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        return "_KWD_MARKER"
+
+
+_KWD_MARKER = _KwdMark()
+_KWD_MARK = (_KWD_MARKER,)
+_FAST_TYPES = {int, str}
+_HASHED_MIN_LEN = 16
+
+
+def make_key(
+    args: Tuple[Any, ...], kwargs: Optional[Mapping[str, Any]], typed: bool = False
+) -> KeyType:
+    # Именованные аргументы берутся в порядке вызова, без сортировки:
+    # f(a=1, b=2) и f(b=2, a=1) попадут в разные записи, как в functools
+    key = args
+    if kwargs:
+        key += _KWD_MARK
+        for item in kwargs.items():
+            key += item
+    if typed:
+        key += tuple(map(type, args))
+        if kwargs:
+            key += tuple(map(type, kwargs.values()))
+    elif len(key) == 1 and type(key[0]) in _FAST_TYPES:
+        return key[0]
+    if len(key) >= _HASHED_MIN_LEN:
+        return _HashedSeq(key)
+    return key
+
+
+def _dump_key(key: KeyType) -> bytes:
+    if type(key) is _HashedSeq:
+        key = tuple(key)
+    return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_key(data: bytes) -> KeyType:
+    # Обратно к тому виду, который строит make_key, иначе ключ не найдётся
+    key = pickle.loads(data)
+    if type(key) is tuple and len(key) >= _HASHED_MIN_LEN:
+        return _HashedSeq(key)
+    return key
+
+
+def _positional_only(f: Callable) -> bool:
+    try:
+        params = inspect.signature(f).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return all(p.kind in (p.POSITIONAL_ONLY, p.VAR_POSITIONAL) for p in params)
+
+
+class _InFlight:
+    # Результат вычисления, которого ждут остальные потоки с тем же ключом
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _CachedError:
+    # Обёртка для закэшированного исключения корутины (cache_exceptions=True)
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def approx_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    # Приблизительный размер объекта вместе с содержимым стандартных коллекций.
+    # sys.getsizeof сам по себе не учитывает элементы списка или словаря.
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += approx_sizeof(k, _seen) + approx_sizeof(v, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += approx_sizeof(item, _seen)
+    return size
+
+
+class _LRUStore:
+    # LRU-хранилище с ограничением по числу записей и/или суммарному весу
+    # и временем жизни записей. Порядок data — порядок использования
+    # (в начале самые старые), порядок expires — порядок записи: при общем
+    # ttl он совпадает с порядком истечения, так что чистка снимает
+    # просроченные записи с начала, не просматривая весь кэш.
+    def __init__(
+        self,
+        maxsize: Optional[int],
+        maxbytes: Optional[int] = None,
+        weigher: Optional[Callable[[Any], int]] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.weigher = weigher
+        self.ttl = ttl
+        self.data: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.weights: "dict[KeyType, int]" = {}
+        self.expires: "OrderedDict[KeyType, float]" = OrderedDict()
+        self.currbytes = 0
+        self.next_sweep = 0.0
+        self.evictions = 0
+        # Вызывается с (key, value) для вытесненных и не принятых по весу записей
+        self.on_evict: Optional[Callable[[KeyType, Any], None]] = None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get(self, key: KeyType) -> Any:
+        value = self.data.get(key, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+
+        if self.ttl is not None:
+            now = time.monotonic()
+            if self.expires[key] <= now:
+                self.discard(key)
+                return _MISSING
+            if now >= self.next_sweep:
+                self.sweep(now)
+
+        self.data.move_to_end(key)
+        return value
+
+    def put(self, key: KeyType, value: Any) -> None:
+        if key in self.data:
+            self.discard(key)
+
+        if self.weigher is not None:
+            weight = self.weigher(value)
+            # Запись тяжелее всего бюджета не вытесняет кэш целиком,
+            # а просто не попадает в него
+            if self.maxbytes is not None and weight > self.maxbytes:
+                if self.on_evict is not None:
+                    self.on_evict(key, value)
+                return
+            self.weights[key] = weight
+            self.currbytes += weight
+
+        if self.ttl is not None:
+            now = time.monotonic()
+            self.expires[key] = now + self.ttl
+            if now >= self.next_sweep:
+                self.sweep(now)
+
+        self.data[key] = value
+
+        while (self.maxsize is not None and len(self.data) > self.maxsize) or (
+            self.maxbytes is not None and self.currbytes > self.maxbytes
+        ):
+            old = next(iter(self.data))
+            if self.on_evict is not None:
+                self.on_evict(old, self.data[old])
+            self.discard(old)
+            self.evictions += 1
+
+    def discard(self, key: KeyType) -> None:
+        del self.data[key]
+        if self.weigher is not None:
+            self.currbytes -= self.weights.pop(key)
+        if self.ttl is not None:
+            del self.expires[key]
+
+    def sweep(self, now: float) -> None:
+        expires = self.expires
+        while expires:
+            key, deadline = next(iter(expires.items()))
+            if deadline > now:
+                break
+            self.discard(key)
+        self.next_sweep = now + self.ttl
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.weights.clear()
+        self.expires.clear()
+        self.currbytes = 0
+        self.evictions = 0
+
+
+class _LFUStore:
+    # LFU за O(1): ключи разложены по корзинам частот, внутри корзины —
+    # в порядке использования, так что при равной частоте вытесняется самый старый.
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: "dict[KeyType, Any]" = {}
+        self.freq: "dict[KeyType, int]" = {}
+        self.buckets: "dict[int, OrderedDict[KeyType, None]]" = {}
+        self.min_freq = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def bump(self, key: KeyType) -> None:
+        f = self.freq[key]
+        bucket = self.buckets[f]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[f]
+            if self.min_freq == f:
+                self.min_freq = f + 1
+        self.freq[key] = f + 1
+        self.buckets.setdefault(f + 1, OrderedDict())[key] = None
+
+    def get(self, key: KeyType) -> Any:
+        value = self.data.get(key, _MISSING)
+        if value is not _MISSING:
+            self.bump(key)
+        return value
+
+    def put(self, key: KeyType, value: Any) -> None:
+        if key in self.data:
+            self.data[key] = value
+            self.bump(key)
+            return
+
+        if len(self.data) >= self.maxsize:
+            bucket = self.buckets[self.min_freq]
+            old, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self.buckets[self.min_freq]
+            del self.data[old]
+            del self.freq[old]
+            self.evictions += 1
+
+        self.data[key] = value
+        self.freq[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_freq = 1
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.freq.clear()
+        self.buckets.clear()
+        self.min_freq = 0
+        self.evictions = 0
+
+
+class _ARCStore:
+    # Adaptive Replacement Cache (Megiddo, Modha). t1 — ключи, встреченные
+    # один раз, t2 — повторно; b1/b2 — «призраки» недавно вытесненных из них
+    # ключей без значений. Попадание в призрак сдвигает целевой размер t1 (p)
+    # в сторону той части, которой не хватило места.
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.p = 0.0
+        self.t1: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.t2: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.b1: "OrderedDict[KeyType, None]" = OrderedDict()
+        self.b2: "OrderedDict[KeyType, None]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.t1) + len(self.t2)
+
+    def get(self, key: KeyType) -> Any:
+        if key in self.t1:
+            value = self.t1.pop(key)
+            self.t2[key] = value
+            return value
+        if key in self.t2:
+            self.t2.move_to_end(key)
+            return self.t2[key]
+        return _MISSING
+
+    def replace(self, in_b2: bool) -> None:
+        if self.t1 and (len(self.t1) > self.p or (in_b2 and len(self.t1) == self.p)):
+            old, _ = self.t1.popitem(last=False)
+            self.b1[old] = None
+            self.evictions += 1
+        elif self.t2:
+            old, _ = self.t2.popitem(last=False)
+            self.b2[old] = None
+            self.evictions += 1
+
+    def put(self, key: KeyType, value: Any) -> None:
+        c = self.maxsize
+        t1, t2, b1, b2 = self.t1, self.t2, self.b1, self.b2
+
+        if key in t1 or key in t2:
+            self.get(key)
+            t2[key] = value
+            return
+
+        full = len(t1) + len(t2) >= c
+
+        if key in b1:
+            self.p = min(c, self.p + max(len(b2) / len(b1), 1))
+            del b1[key]
+            if full:
+                self.replace(False)
+            t2[key] = value
+            return
+
+        if key in b2:
+            self.p = max(0.0, self.p - max(len(b1) / len(b2), 1))
+            del b2[key]
+            if full:
+                self.replace(True)
+            t2[key] = value
+            return
+
+        if len(t1) + len(b1) >= c:
+            if len(t1) < c:
+                b1.popitem(last=False)
+                if full:
+                    self.replace(False)
+            else:
+                t1.popitem(last=False)
+                self.evictions += 1
+        elif full:
+            if len(t1) + len(t2) + len(b1) + len(b2) >= 2 * c:
+                b2.popitem(last=False)
+            self.replace(False)
+
+        t1[key] = value
+
+    def clear(self) -> None:
+        self.p = 0.0
+        self.t1.clear()
+        self.t2.clear()
+        self.b1.clear()
+        self.b2.clear()
+        self.evictions = 0
+
+
+class _FrequencySketch:
+    # Count-Min Sketch с 4-битными (до 15) счётчиками и старением: после
+    # sample_size инкрементов все счётчики делятся пополам, чтобы давняя
+    # популярность не держала ключи в кэше вечно. Четыре строки лежат в одном
+    # bytearray, индексы получаются из одного перемешанного хэша (h1 + i * h2).
+    DEPTH = 4
+
+    def __init__(self, maxsize: int) -> None:
+        width = 1
+        while width < maxsize * 4:
+            width <<= 1
+        self.width = width
+        self.mask = width - 1
+        self.table = bytearray(width * self.DEPTH)
+        self.sample_size = 10 * maxsize
+        self.additions = 0
+
+    def indexes(self, key: KeyType) -> tuple:
+        h = (hash(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        mask, width = self.mask, self.width
+        return (
+            h1 & mask,
+            width + ((h1 + h2) & mask),
+            2 * width + ((h1 + 2 * h2) & mask),
+            3 * width + ((h1 + 3 * h2) & mask),
+        )
+
+    def increment(self, key: KeyType) -> None:
+        table = self.table
+        added = False
+        for i in self.indexes(key):
+            if table[i] < 15:
+                table[i] += 1
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.reset()
+
+    def frequency(self, key: KeyType) -> int:
+        table = self.table
+        a, b, c, d = self.indexes(key)
+        return min(table[a], table[b], table[c], table[d])
+
+    def reset(self) -> None:
+        self.table = bytearray(v >> 1 for v in self.table)
+        self.additions //= 2
+
+    def clear(self) -> None:
+        self.table = bytearray(len(self.table))
+        self.additions = 0
+
+
+class _TinyLFUStore:
+    # W-TinyLFU (Einziger, Friedman, Manes): новые ключи попадают в маленькое
+    # LRU-окно (~1%), вытесненный из окна кандидат допускается в основную
+    # SLRU-часть, только если по скетчу он встречался чаще, чем её жертва.
+    # Основная часть делится на probation (~20%) и protected (~80%).
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.window_size = max(1, maxsize // 100)
+        self.main_size = maxsize - self.window_size
+        self.protected_size = int(self.main_size * 0.8)
+        self.sketch = _FrequencySketch(maxsize)
+        self.window: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.probation: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.protected: "OrderedDict[KeyType, Any]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def get(self, key: KeyType) -> Any:
+        self.sketch.increment(key)
+
+        if key in self.window:
+            self.window.move_to_end(key)
+            return self.window[key]
+
+        if key in self.protected:
+            self.protected.move_to_end(key)
+            return self.protected[key]
+
+        if key in self.probation:
+            value = self.probation.pop(key)
+            self.protected[key] = value
+            if len(self.protected) > self.protected_size:
+                old, old_value = self.protected.popitem(last=False)
+                self.probation[old] = old_value
+            return value
+
+        return _MISSING
+
+    def put(self, key: KeyType, value: Any) -> None:
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                segment[key] = value
+                return
+
+        self.window[key] = value
+        if len(self.window) <= self.window_size:
+            return
+
+        candidate, candidate_value = self.window.popitem(last=False)
+        if len(self.probation) + len(self.protected) < self.main_size:
+            self.probation[candidate] = candidate_value
+            return
+
+        # Из кэша уходит кто-то один: либо жертва основной части, либо сам кандидат
+        self.evictions += 1
+        victims = self.probation or self.protected
+        if not victims:
+            return
+        victim = next(iter(victims))
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            del victims[victim]
+            self.probation[candidate] = candidate_value
+
+    def clear(self) -> None:
+        self.sketch.clear()
+        self.window.clear()
+        self.probation.clear()
+        self.protected.clear()
+        self.evictions = 0
+
+
+_POLICIES = {
+    "lfu": _LFUStore,
+    "arc": _ARCStore,
+    "tinylfu": _TinyLFUStore,
+}
+
+
+class _SharedStore:
+    # Общий для всех процессов узла кэш в multiprocessing.shared_memory:
+    # таблица слотов фиксированного размера, разбитая на корзины по WAYS
+    # слотов. Ключ и значение хранятся в pickle, корзины выбираются по
+    # blake2b от байтов ключа (hash() строк в разных процессах разный).
+    # У ключа две возможные корзины, запись идёт в более свободную: так
+    # таблица почти не теряет записи на коллизиях, пока не заполнится.
+    # Перед слотами лежат 8-байтные метки (тот же blake2b, 0 — пустой слот),
+    # поэтому поиск в корзине — один unpack_from на всю корзину.
+    #
+    # Слот: crc32 | длина ключа | длина значения | ключ | значение.
+    # Блокировок между процессами нет: писатели могут перетереть друг другу
+    # слот, но читатель сверяет crc32 и байты ключа, так что порванная
+    # запись выглядит как промах, а не как чужое значение. Вытеснение —
+    # по кругу внутри корзины, без LRU: обновлять порядок на каждом
+    # попадании значило бы писать в общую память при каждом чтении.
+    # Записи, не влезающие в слот или не сериализуемые pickle, не кэшируются.
+    MAGIC = b"LRUSHM02"
+    HEADER = struct.Struct("<8sII")
+    SLOT = struct.Struct("<III")
+    WAYS = 8
+    TAGS = struct.Struct(f"<{WAYS}Q")
+
+    def __init__(self, name: str, maxsize: int, slot_size: int) -> None:
+        # Запас в четверть ёмкости: иначе корзины переполняются раньше,
+        # чем кэш заполнится, и записи вытесняют друг друга по коллизиям
+        self.maxsize = maxsize
+        self.nbuckets = -(-maxsize * 5 // 4 // self.WAYS)
+        self.nslots = self.nbuckets * self.WAYS
+        self.slot_size = slot_size
+        self.slots_offset = self.HEADER.size + self.nslots * 8
+        self.evictions = 0
+        self.next_victim = 0
+
+        size = self.slots_offset + self.nslots * slot_size
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self.shm = shared_memory.SharedMemory(name, track=False)
+            layout = self.HEADER.unpack_from(self.shm.buf)
+            if layout != (self.MAGIC, slot_size, self.nslots):
+                raise ValueError(
+                    f"Shared cache {name!r} already exists with another layout"
+                )
+        else:
+            self.HEADER.pack_into(self.shm.buf, 0, self.MAGIC, slot_size, self.nslots)
+            atexit.register(self.unlink, os.getpid())
+
+        self.buf = self.shm.buf
+
+    def unlink(self, owner: int) -> None:
+        # Сегмент удаляет только создавший его процесс, а не дети после fork
+        if os.getpid() == owner:
+            self.shm.unlink()
+
+    def __len__(self) -> int:
+        tags = struct.unpack_from(f"<{self.nslots}Q", self.buf, self.HEADER.size)
+        return sum(1 for tag in tags if tag)
+
+    def locate(self, key_bytes: bytes):
+        # Метка ключа и первые слоты двух его корзин
+        digest = hashlib.blake2b(key_bytes, digest_size=8).digest()
+        h = int.from_bytes(digest, "little")
+        first = (h >> 1) % self.nbuckets * self.WAYS
+        second = (h >> 33) % self.nbuckets * self.WAYS
+        return h | 1, (first, second)
+
+    def tags(self, first: int) -> tuple:
+        return self.TAGS.unpack_from(self.buf, self.HEADER.size + first * 8)
+
+    def read(self, slot: int, key_bytes: bytes) -> Optional[bytes]:
+        # Байты значения, если в слоте целая запись именно с этим ключом
+        buf, klen = self.buf, len(key_bytes)
+        off = self.slots_offset + slot * self.slot_size
+        crc, stored_klen, vlen = self.SLOT.unpack_from(buf, off)
+        if stored_klen != klen or self.SLOT.size + klen + vlen > self.slot_size:
+            return None
+        start = off + self.SLOT.size
+        if buf[start : start + klen] != key_bytes:
+            return None
+        record = bytes(buf[off + 4 : start + klen + vlen])
+        if zlib.crc32(record) != crc:
+            return None
+        return record[8 + klen :]
+
+    def get(self, key: KeyType) -> Any:
+        try:
+            key_bytes = _dump_key(key)
+        except Exception:
+            return _MISSING
+
+        tag, buckets = self.locate(key_bytes)
+        for first in buckets:
+            for way, stored in enumerate(self.tags(first)):
+                if stored == tag:
+                    value_bytes = self.read(first + way, key_bytes)
+                    if value_bytes is not None:
+                        try:
+                            return pickle.loads(value_bytes)
+                        except Exception:
+                            return _MISSING
+        return _MISSING
+
+    def put(self, key: KeyType, value: Any) -> None:
+        try:
+            key_bytes = _dump_key(key)
+            value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+
+        record = struct.pack("<II", len(key_bytes), len(value_bytes))
+        record += key_bytes + value_bytes
+        if 4 + len(record) > self.slot_size:
+            return
+
+        tag, buckets = self.locate(key_bytes)
+        candidates = [(first, self.tags(first)) for first in buckets]
+        for first, tags in candidates:
+            if tag in tags:
+                slot = first + tags.index(tag)
+                break
+        else:
+            first, tags = max(candidates, key=lambda c: c[1].count(0))
+            if 0 in tags:
+                slot = first + tags.index(0)
+            else:
+                slot = first + self.next_victim % self.WAYS
+                self.next_victim += 1
+                self.evictions += 1
+
+        tag_off = self.HEADER.size + slot * 8
+        off = self.slots_offset + slot * self.slot_size
+        struct.pack_into("<Q", self.buf, tag_off, 0)
+        self.buf[off : off + 4 + len(record)] = (
+            struct.pack("<I", zlib.crc32(record)) + record
+        )
+        struct.pack_into("<Q", self.buf, tag_off, tag)
+
+    def clear(self) -> None:
+        start = self.HEADER.size
+        self.buf[start:] = bytes(len(self.buf) - start)
+        self.evictions = 0
+
+
+class _DiskTier:
+    # Второй уровень кэша в sqlite. Запись — целиком в транзакции в режиме
+    # WAL, так что падение процесса не оставляет файл битым, в худшем случае
+    # теряются последние записи. Вытесненные из памяти записи копятся
+    # в pending и пишутся пачкой: транзакция на каждое вытеснение дороже
+    # самого кэша. Несколько функций делят файл, различаясь по fn.
+    # В namespaces для каждого fn хранится версия кода: при смене версии его
+    # записи удаляются. Пространства, которые никто не открывал дольше
+    # STALE_AFTER, удаляются вместе с записями, как и записи без пространства.
+    BATCH = 64
+    STALE_AFTER = 30 * 24 * 3600
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        maxsize: Optional[int],
+        maxbytes: Optional[int],
+        version: str = "",
+    ) -> None:
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.pending: "dict[bytes, tuple[bytes, int]]" = {}
+        self.conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " fn TEXT NOT NULL, key BLOB NOT NULL, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, hits INTEGER NOT NULL, atime REAL NOT NULL,"
+            " PRIMARY KEY (fn, key))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS namespaces ("
+            " fn TEXT PRIMARY KEY, version TEXT NOT NULL, atime REAL NOT NULL)"
+        )
+        self.open(version)
+
+    def open(self, version: str) -> None:
+        now = time.time()
+        with self.transaction():
+            row = self.conn.execute(
+                "SELECT version FROM namespaces WHERE fn = ?", (self.namespace,)
+            ).fetchone()
+            if row is not None and row[0] != version:
+                self.conn.execute("DELETE FROM entries WHERE fn = ?", (self.namespace,))
+            self.conn.execute(
+                "INSERT INTO namespaces (fn, version, atime) VALUES (?, ?, ?)"
+                " ON CONFLICT (fn) DO UPDATE SET version = excluded.version,"
+                " atime = excluded.atime",
+                (self.namespace, version, now),
+            )
+            self.prune(now - self.STALE_AFTER)
+
+    def prune(self, before: float) -> None:
+        self.conn.execute("DELETE FROM namespaces WHERE atime < ?", (before,))
+        self.conn.execute(
+            "DELETE FROM entries WHERE fn NOT IN (SELECT fn FROM namespaces)"
+        )
+
+    def get(self, key_bytes: bytes) -> Optional[bytes]:
+        if key_bytes in self.pending:
+            return self.pending[key_bytes][0]
+        row = self.conn.execute(
+            "SELECT value FROM entries WHERE fn = ? AND key = ?",
+            (self.namespace, key_bytes),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, key_bytes: bytes, value_bytes: bytes, hits: int) -> None:
+        if key_bytes in self.pending:
+            hits += self.pending[key_bytes][1]
+        self.pending[key_bytes] = (value_bytes, hits)
+        if len(self.pending) >= self.BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        now = time.time()
+        rows = [
+            (self.namespace, k, v, len(v), hits, now)
+            for k, (v, hits) in self.pending.items()
+        ]
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO entries (fn, key, value, size, hits, atime)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (fn, key) DO UPDATE SET value = excluded.value,"
+                " size = excluded.size, hits = entries.hits + excluded.hits,"
+                " atime = excluded.atime",
+                rows,
+            )
+            self.conn.execute(
+                "UPDATE namespaces SET atime = ? WHERE fn = ?", (now, self.namespace)
+            )
+            self.trim()
+        self.pending.clear()
+
+    def trim(self) -> None:
+        # Сверх лимитов удаляются самые редко используемые записи
+        if self.maxsize is not None:
+            self.conn.execute(
+                "DELETE FROM entries WHERE fn = ? AND key IN ("
+                " SELECT key FROM entries WHERE fn = ?"
+                " ORDER BY hits DESC, atime DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.maxsize),
+            )
+        if self.maxbytes is not None:
+            self.conn.execute(
+                "DELETE FROM entries WHERE fn = ? AND key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER"
+                " (ORDER BY hits DESC, atime DESC) AS total"
+                " FROM entries WHERE fn = ?) WHERE total > ?)",
+                (self.namespace, self.namespace, self.maxbytes),
+            )
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def hottest(self, limit: Optional[int]) -> list:
+        return self.conn.execute(
+            "SELECT key, value FROM entries WHERE fn = ?"
+            " ORDER BY hits DESC, atime DESC LIMIT ?",
+            (self.namespace, -1 if limit is None else limit),
+        ).fetchall()
+
+    def clear(self) -> None:
+        self.pending.clear()
+        with self.transaction():
+            self.conn.execute("DELETE FROM entries WHERE fn = ?", (self.namespace,))
+
+
+class _TieredStore:
+    # Память (_LRUStore) поверх _DiskTier. Вытесненное из памяти уходит на
+    # диск, промах в памяти сперва ищется на диске и поднимается обратно.
+    # Для прогрева считаем попадания по ключам в памяти; на диске копится их
+    # сумма, и при старте в память загружаются самые популярные записи.
+    # При выходе из процесса (или по cache_flush) содержимое памяти тоже
+    # сбрасывается на диск. Свой лок нужен, потому что сброс идёт мимо
+    # лока обёртки thread_safe.
+    def __init__(self, memory: _LRUStore, disk: _DiskTier) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.lock = threading.RLock()
+        self.hits: "dict[KeyType, int]" = {}
+        self.maxsize = memory.maxsize
+        memory.on_evict = self.spill
+        self.preload()
+        atexit.register(self.close)
+
+    @property
+    def evictions(self) -> int:
+        return self.memory.evictions
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def preload(self) -> None:
+        # Самые горячие ключи вставляются последними, чтобы оказаться в хвосте LRU
+        for key_bytes, value_bytes in reversed(self.disk.hottest(self.maxsize)):
+            try:
+                key, value = _load_key(key_bytes), pickle.loads(value_bytes)
+            except Exception:
+                continue
+            self.memory.put(key, value)
+            self.hits[key] = 0
+
+    def spill(self, key: KeyType, value: Any) -> None:
+        hits = self.hits.pop(key, 0)
+        try:
+            key_bytes = _dump_key(key)
+            value_bytes = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        self.disk.add(key_bytes, value_bytes, hits)
+
+    def get(self, key: KeyType) -> Any:
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not _MISSING:
+                self.hits[key] += 1
+                return value
+
+            try:
+                value_bytes = self.disk.get(_dump_key(key))
+                if value_bytes is None:
+                    return _MISSING
+                value = pickle.loads(value_bytes)
+            except Exception:
+                return _MISSING
+            self.put(key, value)
+            self.hits[key] = 1
+            return value
+
+    def put(self, key: KeyType, value: Any) -> None:
+        with self.lock:
+            self.hits.setdefault(key, 0)
+            self.memory.put(key, value)
+
+    def close(self) -> None:
+        # Память остаётся как есть; счётчики сброшены, чтобы не учесть их дважды
+        with self.lock:
+            for key, value in self.memory.data.items():
+                self.spill(key, value)
+                self.hits[key] = 0
+            self.disk.flush()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.hits.clear()
+            self.disk.clear()
+
+
+def _shared_name(f: Callable) -> str:
+    # Одинаковое для всех процессов, запустивших один и тот же код: имя модуля
+    # не подходит (в дочернем процессе spawn это __mp_main__), поэтому берём
+    # файл, строку, qualname и байткод — после правки функции старые значения
+    # не всплывут
+    code = getattr(f, "__code__", None)
+    ident = [
+        getattr(code, "co_filename", ""),
+        str(getattr(code, "co_firstlineno", "")),
+        getattr(f, "__qualname__", repr(f)),
+        getattr(code, "co_code", b"").hex(),
+    ]
+    digest = hashlib.blake2b("|".join(ident).encode(), digest_size=10)
+    return "lru_" + digest.hexdigest()
+
+
+def _disk_namespace(f: Callable) -> "tuple[str, str]":
+    # Имя пространства на диске — модуль и qualname: не меняется от правок
+    # выше функции, в отличие от _shared_name. Запущенный скриптом модуль
+    # называется по файлу (__main__ и __mp_main__ — одно и то же). Версия —
+    # хэш байткода и констант: правка самой функции сбрасывает её записи
+    code = getattr(f, "__code__", None)
+    module = getattr(f, "__module__", None) or ""
+    if module in ("__main__", "__mp_main__") and code is not None:
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = f"{module}:{getattr(f, '__qualname__', repr(f))}"
+
+    version = hashlib.blake2b(digest_size=10)
+    if code is not None:
+        _hash_code(code, version)
+    return name, version.hexdigest()
+
+
+def _hash_code(code: Any, digest: Any) -> None:
+    # repr вложенного code-объекта содержит адрес и номер строки — их
+    # хэшируем по содержимому
+    digest.update(code.co_code)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def lru_cache(
+    func: Optional[Callable] = None,
+    *,
+    maxsize: Optional[int] = 128,
+    maxbytes: Optional[int] = None,
+    weigher: Optional[Callable[[Any], int]] = None,
+    ttl: Optional[float] = None,
+    policy: str = "lru",
+    thread_safe: bool = False,
+    cache_exceptions: bool = False,
+    stats: bool = False,
+    typed: bool = False,
+    backend: str = "memory",
+    shared_name: Optional[str] = None,
+    slot_size: int = 256,
+    disk_path: Optional[str] = None,
+    disk_maxsize: Optional[int] = None,
+    disk_maxbytes: Optional[int] = None,
+    disk_namespace: Optional[str] = None,
+):
+    if maxsize is not None and (not isinstance(maxsize, int) or maxsize < 0):
+        raise TypeError("'maxsize' must be a non-negative int or None")
+    if maxbytes is not None and (not isinstance(maxbytes, int) or maxbytes <= 0):
+        raise TypeError("'maxbytes' must be a positive int")
+    if weigher is not None and not callable(weigher):
+        raise TypeError("'weigher' must be callable")
+    if ttl is not None and (not isinstance(ttl, (int, float)) or ttl <= 0):
+        raise TypeError("'ttl' must be a positive number")
+    if policy != "lru" and policy not in _POLICIES:
+        raise ValueError(f"Unknown cache policy {policy!r}")
+    if policy != "lru" and (maxbytes is not None or ttl is not None):
+        raise TypeError("'maxbytes' and 'ttl' are only supported with policy='lru'")
+    if backend not in ("memory", "shared"):
+        raise ValueError(f"Unknown cache backend {backend!r}")
+    if backend == "shared":
+        if not maxsize:
+            raise TypeError("'shared' backend requires a positive int 'maxsize'")
+        if policy != "lru" or maxbytes is not None or ttl is not None:
+            raise TypeError(
+                "'shared' backend does not support 'policy', 'maxbytes' and 'ttl'"
+            )
+        if not isinstance(slot_size, int) or slot_size <= _SharedStore.SLOT.size:
+            raise TypeError("'slot_size' must be an int larger than the slot header")
+    if disk_path is not None:
+        if backend != "memory" or policy != "lru" or ttl is not None:
+            raise TypeError(
+                "'disk_path' is only supported with the memory LRU cache without 'ttl'"
+            )
+        for limit_name, limit in (
+            ("disk_maxsize", disk_maxsize),
+            ("disk_maxbytes", disk_maxbytes),
+        ):
+            if limit is not None and (not isinstance(limit, int) or limit <= 0):
+                raise TypeError(f"'{limit_name}' must be a positive int")
+    if disk_namespace is not None:
+        if disk_path is None:
+            raise TypeError("'disk_namespace' requires 'disk_path'")
+        if not isinstance(disk_namespace, str) or not disk_namespace:
+            raise TypeError("'disk_namespace' must be a non-empty str")
+
+    if maxbytes is not None and weigher is None:
+        weigher = approx_sizeof
+
+    def make_store(f: Callable):
+        if backend == "shared":
+            return _SharedStore(shared_name or _shared_name(f), maxsize, slot_size)
+        if disk_path is not None:
+            # Явный disk_namespace не сбрасывается при правке кода
+            name, version = _disk_namespace(f)
+            if disk_namespace is not None:
+                name, version = disk_namespace, ""
+            disk = _DiskTier(disk_path, name, disk_maxsize, disk_maxbytes, version)
+            return _TieredStore(_LRUStore(maxsize, maxbytes, weigher), disk)
+        if policy == "lru" or maxsize is None:
+            return _LRUStore(maxsize, maxbytes, weigher, ttl)
+        return _POLICIES[policy](maxsize)
 
     def decorator(f: Callable):
-        cache: "OrderedDict[KeyType, Any]" = OrderedDict()
+        original = f
+        timer = None
+        if stats:
+            timer = _MissTimer()
+            f = _timed(f, timer)
 
-        @wraps(f)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            if not maxsize: return f(*args, **kwargs)
-            
-            key = make_key(args, kwargs)
-
-            if key in cache:
-                cache.move_to_end(key)
-                return cache[key]
-            
+        if maxsize == 0:
+            wrapper = _uncached_wrapper(f)
+        elif inspect.iscoroutinefunction(f):
+            wrapper = _async_wrapper(f, make_store(original), cache_exceptions, typed)
+        elif (
+            thread_safe
+            or backend != "memory"
+            or disk_path is not None
+            or policy != "lru"
+            or weigher is not None
+            or ttl is not None
+            or maxsize is None
+        ):
+            store = make_store(original)
+            if thread_safe:
+                wrapper = _thread_safe_wrapper(f, store, typed)
+            else:
+                wrapper = _store_wrapper(f, store, typed)
+            if disk_path is not None:
+                wrapper.cache_flush = store.close
+        elif _positional_only(f):
+            wrapper = _positional_lru_wrapper(f, maxsize, typed)
+        else:
+            wrapper = _lru_wrapper(f, maxsize, typed)
+
+        if timer is not None:
+            _attach_stats(wrapper, timer)
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+# Базовый вариант: OrderedDict прямо в замыкании, без лишних вызовов на
+# горячем пути. Короткий позиционный ключ строится прямо здесь, без вызова
+# make_key. Попадание — один get и move_to_end вместо прежних in, move_to_end
+# и [key]; новый ключ и так вставляется в конец, двигать его не нужно.
+def _lru_wrapper(f: Callable, maxsize: int, typed: bool):
+    cache: "OrderedDict[KeyType, Any]" = OrderedDict()
+    cache_get = cache.get
+    move_to_end = cache.move_to_end
+    hits = misses = evictions = 0
+
+    @wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        nonlocal hits, misses, evictions
+        if kwargs or typed or len(args) >= _HASHED_MIN_LEN:
+            key = make_key(args, kwargs, typed)
+        elif len(args) == 1 and type(args[0]) in _FAST_TYPES:
+            key = args[0]
+        else:
+            key = args
+
+        result = cache_get(key, _MISSING)
+        if result is not _MISSING:
+            hits += 1
+            move_to_end(key)
+            return result
+
+        misses += 1
+        result = f(*args, **kwargs)
+        cache[key] = result
+
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+            evictions += 1
+
+        return result
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, evictions, maxsize, len(cache))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses, evictions
+        cache.clear()
+        hits = misses = evictions = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+# То же для функций, принимающих только позиционные аргументы: интерпретатору
+# не нужно собирать пустой словарь kwargs ни для обёртки, ни для вызова f
+def _positional_lru_wrapper(f: Callable, maxsize: int, typed: bool):
+    cache: "OrderedDict[KeyType, Any]" = OrderedDict()
+    cache_get = cache.get
+    move_to_end = cache.move_to_end
+    hits = misses = evictions = 0
+
+    @wraps(f)
+    def wrapper(*args: Any) -> Any:
+        nonlocal hits, misses, evictions
+        if typed or len(args) >= _HASHED_MIN_LEN:
+            key = make_key(args, None, typed)
+        elif len(args) == 1 and type(args[0]) in _FAST_TYPES:
+            key = args[0]
+        else:
+            key = args
+
+        result = cache_get(key, _MISSING)
+        if result is not _MISSING:
+            hits += 1
+            move_to_end(key)
+            return result
+
+        misses += 1
+        result = f(*args)
+        cache[key] = result
+
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+            evictions += 1
+
+        return result
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, evictions, maxsize, len(cache))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses, evictions
+        cache.clear()
+        hits = misses = evictions = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+def _uncached_wrapper(f: Callable):
+    misses = 0
+
+    @wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        nonlocal misses
+        misses += 1
+        return f(*args, **kwargs)
+
+    if inspect.iscoroutinefunction(f):
+        inspect.markcoroutinefunction(wrapper)
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(0, misses, 0, 0, 0)
+
+    def cache_clear() -> None:
+        nonlocal misses
+        misses = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+# Обычный однопоточный вариант поверх хранилища (вес, ttl, другие политики)
+def _store_wrapper(f: Callable, store: Any, typed: bool):
+    hits = misses = 0
+
+    @wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        nonlocal hits, misses
+        key = make_key(args, kwargs, typed)
+
+        result = store.get(key)
+        if result is not _MISSING:
+            hits += 1
+            return result
+
+        misses += 1
+        result = f(*args, **kwargs)
+        store.put(key, result)
+        return result
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, store.evictions, store.maxsize, len(store))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses
+        store.clear()
+        hits = misses = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+# Потокобезопасный вариант: хранилище меняется только под локом, а промах
+# по ключу вычисляет один поток (single-flight), остальные ждут его результат.
+# Сама функция вызывается вне лока, поэтому разные ключи считаются параллельно.
+# Рекурсивный вызов с тем же ключом из самой функции приведёт к взаимоблокировке.
+# Дождавшиеся чужого вычисления считаются попаданиями.
+def _thread_safe_wrapper(f: Callable, store: Any, typed: bool):
+    lock = threading.Lock()
+    in_flight: "dict[KeyType, _InFlight]" = {}
+    hits = misses = 0
+
+    @wraps(f)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        nonlocal hits, misses
+        key = make_key(args, kwargs, typed)
+
+        with lock:
+            result = store.get(key)
+            if result is not _MISSING:
+                hits += 1
+                return result
+
+            call = in_flight.get(key)
+            leader = call is None
+            if leader:
+                misses += 1
+                call = in_flight[key] = _InFlight()
+            else:
+                hits += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        # Ошибка функции или store.put (weigher, запись на диск) достаётся
+        # всем ожидающим, а ключ освобождается в любом случае
+        try:
             result = f(*args, **kwargs)
-            cache[key] = result
-            cache.move_to_end(key)
+            with lock:
+                store.put(key, result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with lock:
+                del in_flight[key]
+            call.event.set()
+
+        call.result = result
+        return result
+
+    def cache_info() -> CacheInfo:
+        with lock:
+            return CacheInfo(hits, misses, store.evictions, store.maxsize, len(store))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses
+        with lock:
+            store.clear()
+            hits = misses = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+# Вариант для async def: кэшируем не корутину (её можно дождаться лишь раз),
+# а результат. Пока значение считается, все ожидающие с тем же ключом
+# получают одну общую задачу; shield не даёт отмене одного ожидающего
+# оборвать вычисление для остальных. Исключения по умолчанию не кэшируются,
+# но отдаются всем, кто ждал этот вызов.
+def _async_wrapper(f: Callable, store: Any, cache_exceptions: bool, typed: bool):
+    in_flight: "dict[KeyType, asyncio.Future]" = {}
+    hits = misses = 0
+
+    def remember(key: KeyType, task: asyncio.Future) -> None:
+        del in_flight[key]
+        if task.cancelled():
+            return
+
+        error = task.exception()
+        if error is not None:
+            if not cache_exceptions:
+                return
+            value = _CachedError(error)
+        else:
+            value = task.result()
+
+        store.put(key, value)
+
+    @wraps(f)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        nonlocal hits, misses
+        key = make_key(args, kwargs, typed)
+
+        value = store.get(key)
+        if value is not _MISSING:
+            hits += 1
+            if cache_exceptions and type(value) is _CachedError:
+                raise value.error
+            return value
+
+        task = in_flight.get(key)
+        if task is None:
+            misses += 1
+            task = asyncio.ensure_future(f(*args, **kwargs))
+            in_flight[key] = task
+            task.add_done_callback(partial(remember, key))
+        else:
+            hits += 1
+
+        return await asyncio.shield(task)
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, store.evictions, store.maxsize, len(store))
+
+    def cache_clear() -> None:
+        nonlocal hits, misses
+        store.clear()
+        hits = misses = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+class _MissTimer:
+    # Латентность промахов: сумма и гистограмма по степеням двойки
+    # (корзина b — вызовы короче 2**b нс). Пишется только на промахе.
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_ns = 0
+        self.histogram = [0] * 64
+
+    def record(self, elapsed_ns: int) -> None:
+        with self.lock:
+            self.count += 1
+            self.total_ns += elapsed_ns
+            self.histogram[min(elapsed_ns.bit_length(), 63)] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.count = 0
+            self.total_ns = 0
+            self.histogram = [0] * 64
+
+
+def _timed(f: Callable, timer: _MissTimer) -> Callable:
+    # Оборачиваем саму функцию, а не кэш: она вызывается только на промахе,
+    # так что на попаданиях режим статистики ничего не стоит
+    if inspect.iscoroutinefunction(f):
+
+        @wraps(f)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            result = await f(*args, **kwargs)
+            timer.record(time.perf_counter_ns() - start)
+            return result
 
-            if len(cache) > maxsize:
-                cache.popitem(last=False)
+    else:
 
+        @wraps(f)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            result = f(*args, **kwargs)
+            timer.record(time.perf_counter_ns() - start)
             return result
 
+    return timed
+
+
+def _attach_stats(wrapper: Callable, timer: _MissTimer) -> None:
+    cache_info = wrapper.cache_info
+    cache_clear = wrapper.cache_clear
+
+    def cache_stats() -> CacheStats:
+        info = cache_info()
+        calls = info.hits + info.misses
+        mean = timer.total_ns / timer.count / 1e9 if timer.count else 0.0
+        histogram = {2**b: n for b, n in enumerate(timer.histogram) if n}
+        return CacheStats(
+            hits=info.hits,
+            misses=info.misses,
+            evictions=info.evictions,
+            hit_ratio=info.hits / calls if calls else 0.0,
+            miss_time=timer.total_ns / 1e9,
+            mean_miss_time=mean,
+            time_saved=info.hits * mean,
+            histogram=histogram,
+        )
+
+    def clear_with_stats() -> None:
+        cache_clear()
+        timer.clear()
+
+    wrapper.cache_stats = cache_stats
+    wrapper.cache_clear = clear_with_stats
+
+
+# Для функций вида f(keys: list) -> list, считающих значения пачкой:
+# попадания отдаются из кэша, а все промахи (без повторов) уходят в f
+# одним вызовом. Результат — в порядке входных ключей. Ключом служит
+# сам элемент списка, он должен быть хэшируемым.
+def batched_lru_cache(
+    func: Optional[Callable] = None,
+    *,
+    maxsize: Optional[int] = 128,
+    policy: str = "lru",
+):
+    if maxsize is not None and (not isinstance(maxsize, int) or maxsize < 0):
+        raise TypeError("'maxsize' must be a non-negative int or None")
+    if policy != "lru" and policy not in _POLICIES:
+        raise ValueError(f"Unknown cache policy {policy!r}")
+
+    def decorator(f: Callable):
+        if policy == "lru" or not maxsize:
+            store = _LRUStore(maxsize)
+        else:
+            store = _POLICIES[policy](maxsize)
+        hits = misses = 0
+
+        @wraps(f)
+        def wrapper(keys: list) -> list:
+            nonlocal hits, misses
+            results = [None] * len(keys)
+            missing: "dict[Any, list[int]]" = {}
+
+            for i, key in enumerate(keys):
+                value = store.get(key) if maxsize != 0 else _MISSING
+                if value is _MISSING:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    results[i] = value
+            # Повтор отсутствующего ключа в той же пачке получает уже
+            # загруженное значение — как объединённый вызов, это попадание
+            hits += len(keys) - len(missing)
+
+            if missing:
+                misses += len(missing)
+                fetched = f(list(missing))
+                if len(fetched) != len(missing):
+                    raise ValueError(
+                        f"{f.__name__} returned {len(fetched)} results "
+                        f"for {len(missing)} keys"
+                    )
+                for (key, positions), value in zip(missing.items(), fetched):
+                    if maxsize != 0:
+                        store.put(key, value)
+                    for i in positions:
+                        results[i] = value
+
+            return results
+
+        def cache_info() -> CacheInfo:
+            return CacheInfo(hits, misses, store.evictions, maxsize, len(store))
+
+        def cache_clear() -> None:
+            nonlocal hits, misses
+            store.clear()
+            hits = misses = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
         return wrapper
 
     return decorator(func) if func is not None else decorator
@@ -45,10 +1491,12 @@ def lru_cache(func: Optional[Callable] = None, *, maxsize: int = 128):
 def sum_(a: int, b: int) -> int:
     return a + b
 
+
 @lru_cache
 def sum_many(a: int, b: int, *, c: int, d: int) -> int:
     return a + b + c + d
 
+
 @lru_cache(maxsize=3)
 def multiply(a: int, b: int) -> int:
     return a * b
@@ -86,3 +1534,346 @@ if __name__ == "__main__":
     assert dec(1) == 10
     assert dec(2) == 40
     assert mocked.call_count == 4
+
+    slow_calls = unittest.mock.Mock()
+
+    @lru_cache(maxsize=4, thread_safe=True)
+    def slow_square(x: int) -> int:
+        slow_calls(x)
+        time.sleep(0.05)
+        return x * x
+
+    barrier = threading.Barrier(16)
+    answers = []
+
+    def hammer():
+        barrier.wait()
+        answers.append(slow_square(7))
+
+    threads = [threading.Thread(target=hammer) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert answers == [49] * 16
+    assert slow_calls.call_count == 1
+
+    failing = unittest.mock.Mock(side_effect=[ValueError("boom"), 5])
+    safe_failing = lru_cache(maxsize=2, thread_safe=True)(failing)
+    try:
+        safe_failing(1)
+        assert False, "exception must propagate"
+    except ValueError:
+        pass
+    assert safe_failing(1) == 5
+    assert safe_failing(1) == 5
+    assert failing.call_count == 2
+
+    # weigher падает, пока второй поток ждёт тот же ключ: оба получают
+    # ошибку, ключ не остаётся занятым
+    weigh_errors = [ValueError("weigh")]
+
+    def flaky_weigher(value):
+        if weigh_errors:
+            raise weigh_errors.pop()
+        return 1
+
+    @lru_cache(maxsize=None, maxbytes=100, weigher=flaky_weigher, thread_safe=True)
+    def slow_value(x: int) -> int:
+        time.sleep(0.05)
+        return x
+
+    outcomes = []
+
+    def weigh_call():
+        try:
+            outcomes.append(slow_value(1))
+        except ValueError as e:
+            outcomes.append(str(e))
+
+    threads = [threading.Thread(target=weigh_call) for _ in range(2)]
+    threads[0].start()
+    time.sleep(0.01)
+    threads[1].start()
+    for t in threads:
+        t.join(timeout=5)
+    assert not any(t.is_alive() for t in threads)
+    assert outcomes == ["weigh", "weigh"]
+    assert slow_value(1) == 1
+
+    fetch_calls = unittest.mock.Mock()
+
+    @lru_cache(maxsize=8)
+    async def fetch(url: str) -> dict:
+        fetch_calls(url)
+        await asyncio.sleep(0.01)
+        if url.startswith("bad"):
+            raise ConnectionError(url)
+        return {"url": url}
+
+    async def check_async():
+        first = await asyncio.gather(*(fetch("a") for _ in range(10)))
+        assert all(r is first[0] for r in first)
+        assert await fetch("a") is first[0]
+        assert fetch_calls.call_count == 1
+
+        errors = await asyncio.gather(
+            *(fetch("bad") for _ in range(5)), return_exceptions=True
+        )
+        assert all(isinstance(e, ConnectionError) for e in errors)
+        assert fetch_calls.call_count == 2
+        try:
+            await fetch("bad")
+            assert False, "exceptions must not be cached by default"
+        except ConnectionError:
+            pass
+        assert fetch_calls.call_count == 3
+
+        sticky_calls = unittest.mock.Mock()
+
+        @lru_cache(maxsize=8, cache_exceptions=True)
+        async def sticky(x: int) -> int:
+            sticky_calls(x)
+            raise KeyError(x)
+
+        for _ in range(3):
+            try:
+                await sticky(1)
+                assert False
+            except KeyError:
+                pass
+        assert sticky_calls.call_count == 1
+
+    asyncio.run(check_async())
+
+    payloads = unittest.mock.Mock(side_effect=lambda n: b"x" * n)
+    by_bytes = lru_cache(maxsize=None, maxbytes=1000, weigher=len)(payloads)
+    by_bytes(400)
+    by_bytes(400)
+    by_bytes(500)
+    assert payloads.call_count == 2
+    by_bytes(300)  # 400 + 500 + 300 > 1000, вытесняется самый старый (400)
+    by_bytes(500)
+    assert payloads.call_count == 3
+    by_bytes(400)
+    assert payloads.call_count == 4
+    by_bytes(5000)  # тяжелее всего бюджета: не кэшируется и ничего не вытесняет
+    by_bytes(500)
+    assert payloads.call_count == 5
+
+    expiring_calls = unittest.mock.Mock(side_effect=lambda x: x)
+    expiring = lru_cache(maxsize=8, ttl=0.05)(expiring_calls)
+    expiring(1)
+    expiring(1)
+    assert expiring_calls.call_count == 1
+    time.sleep(0.1)
+    expiring(1)
+    assert expiring_calls.call_count == 2
+
+    assert approx_sizeof([b"a" * 1000]) > 1000
+
+    for name in ("lru", "lfu", "arc", "tinylfu"):
+        policy_calls = unittest.mock.Mock(side_effect=lambda x: x * 10)
+        cached = lru_cache(maxsize=64, policy=name)(policy_calls)
+        hot = list(range(10))
+        for _ in range(5):
+            for k in hot:
+                assert cached(k) == k * 10
+        assert policy_calls.call_count == 10, name
+        for k in range(1000, 1300):  # однократный скан
+            cached(k)
+        for k in hot:
+            cached(k)
+        if name == "lru":
+            assert policy_calls.call_count == 320, name
+        else:
+            # частые ключи переживают скан
+            assert policy_calls.call_count == 310, name
+
+    freq_calls = unittest.mock.Mock(side_effect=lambda x: x)
+    lfu = lru_cache(maxsize=2, policy="lfu")(freq_calls)
+    lfu(1), lfu(1), lfu(2), lfu(3)  # 2 и 3 встречались реже, вытесняется 2
+    lfu(1)
+    lfu(3)
+    assert freq_calls.call_count == 3
+    lfu(2)
+    assert freq_calls.call_count == 4
+
+    assert sum_.cache_info().currsize > 0
+    info_calls = unittest.mock.Mock(side_effect=lambda x: x)
+    variants = (
+        {},
+        {"policy": "arc"},
+        {"policy": "lfu"},
+        {"thread_safe": True},
+        {"ttl": 60},
+    )
+    for kwargs in variants:
+        info_calls.reset_mock()
+        counted = lru_cache(maxsize=2, **kwargs)(info_calls)
+        for k in [1, 1, 2, 3, 4]:
+            counted(k)
+        info = counted.cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 4, 2), kwargs
+        assert info.evictions == 2 and info.currsize == 2, kwargs
+        counted.cache_clear()
+        assert counted.cache_info() == CacheInfo(0, 0, 0, 2, 0), kwargs
+        counted(1)
+        assert info_calls.call_count == 5, kwargs
+    assert not hasattr(counted, "cache_stats")
+
+    @lru_cache(maxsize=4, stats=True)
+    def timed_square(x: int) -> int:
+        time.sleep(0.01)
+        return x * x
+
+    for k in [1, 2, 1, 1, 2]:
+        timed_square(k)
+    report = timed_square.cache_stats()
+    assert (report.hits, report.misses) == (3, 2)
+    assert report.hit_ratio == 0.6
+    assert report.mean_miss_time >= 0.01
+    assert abs(report.time_saved - 3 * report.mean_miss_time) < 1e-9
+    assert sum(report.histogram.values()) == 2
+    timed_square.cache_clear()
+    assert timed_square.cache_stats().miss_time == 0
+
+    assert make_key((1,), {}) == 1
+    assert make_key((1, ("c", 3)), {}) != make_key((1,), {"c": 3})
+    assert make_key((1,), {}, typed=True) != make_key((1.0,), {}, typed=True)
+    long_key = make_key(tuple(range(20)), {})
+    assert type(long_key) is _HashedSeq and hash(long_key) == hash(tuple(range(20)))
+
+    typed_calls = unittest.mock.Mock(side_effect=lambda x: x)
+    typed_cache = lru_cache(typed=True)(typed_calls)
+    assert type(typed_cache(1)) is int
+    assert type(typed_cache(1.0)) is float
+    assert typed_calls.call_count == 2
+
+    @lru_cache(maxsize=2)
+    def add_positional(a, b, /):
+        return a + b
+
+    assert add_positional(1, 2) == 3
+    assert add_positional(1, 2) == 3
+    assert add_positional.cache_info().hits == 1
+
+    @lru_cache(maxsize=64, backend="shared", shared_name=f"lru_test_{os.getpid()}")
+    def shared_factors(n: int) -> list:
+        return [d for d in range(1, n + 1) if n % d == 0]
+
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        computed = pool.map(shared_factors, [12, 30, 12])
+    assert shared_factors(12) == computed[0] == [1, 2, 3, 4, 6, 12]
+    assert shared_factors(30) == computed[1]
+    # всё посчитали дочерние процессы, родитель только читает общий кэш
+    assert shared_factors.cache_info()[:2] == (2, 0)
+    assert shared_factors.cache_info().currsize == 2
+    shared_factors.cache_clear()
+    assert shared_factors.cache_info().currsize == 0
+
+    oversized = lru_cache(
+        maxsize=4, backend="shared", slot_size=64, shared_name=f"lru_big_{os.getpid()}"
+    )(lambda n: "x" * n)
+    assert oversized(1000) == oversized(1000) == "x" * 1000
+    assert oversized.cache_info()[:2] == (0, 2)  # не влезает в слот, не кэшируется
+    assert oversized(3) == oversized(3) == "xxx"
+    assert oversized.cache_info()[:2] == (1, 3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disk_file = os.path.join(tmp, "cache.sqlite")
+        disk_calls = unittest.mock.Mock()
+
+        def start_worker():
+            # Один и тот же код, как у процесса после перезапуска
+            @lru_cache(maxsize=2, disk_path=disk_file)
+            def disk_square(x: int, *, shift: int = 0) -> int:
+                disk_calls(x)
+                return x * x + shift
+
+            return disk_square
+
+        first_run = start_worker()
+        for k in [1, 2, 3, 3, 3, 2]:
+            first_run(k)
+        assert disk_calls.call_count == 3
+        assert first_run(1) == 1  # вытеснен в L2 и поднят обратно без пересчёта
+        assert first_run(4, shift=1) == 17
+        assert disk_calls.call_count == 4
+        first_run.cache_flush()
+
+        second_run = start_worker()
+        assert second_run.cache_info().currsize == 2  # прогрет самыми горячими
+        assert second_run(3) == 9
+        assert second_run(4, shift=1) == 17
+        assert second_run(1) == 1
+        assert disk_calls.call_count == 4
+
+        second_run.cache_clear()
+        assert start_worker().cache_info().currsize == 0
+
+        # Правка выше функции сдвигает номера строк, но не её пространство
+        # на диске; правка тела — сбрасывает его записи
+        def compile_worker(source, lines_above=0):
+            code = compile("\n" * lines_above + source, __file__, "exec")
+            namespace = {"__name__": __name__, "lru_cache": lru_cache}
+            namespace["disk_file"], namespace["calls"] = disk_file, disk_calls
+            exec(code, namespace)
+            return namespace["moved"]
+
+        source = (
+            "@lru_cache(maxsize=2, disk_path=disk_file)\n"
+            "def moved(x):\n"
+            "    calls(x)\n"
+            "    return x + {}\n"
+        )
+        disk_calls.reset_mock()
+        before = compile_worker(source.format(1))
+        assert before(1) == 2
+        before.cache_flush()
+        after = compile_worker(source.format(1), lines_above=40)
+        assert after(1) == 2 and disk_calls.call_count == 1
+        edited = compile_worker(source.format(2), lines_above=40)
+        assert edited.cache_info().currsize == 0
+        assert edited(1) == 3 and disk_calls.call_count == 2
+
+        @lru_cache(maxsize=2, disk_path=disk_file, disk_namespace="pinned")
+        def pinned(x: int) -> int:
+            return x
+
+        pinned(1)
+        pinned.cache_flush()
+        with sqlite3.connect(disk_file) as conn:
+            # Старое пространство без записи в namespaces и давно не
+            # открывавшееся удаляются при следующем открытии файла
+            conn.execute(
+                "INSERT INTO entries VALUES ('lru_old', x'00', x'00', 1, 0, 0)"
+            )
+            conn.execute("UPDATE namespaces SET atime = 0 WHERE fn = 'pinned'")
+        start_worker()
+        with sqlite3.connect(disk_file) as conn:
+            names = {row[0] for row in conn.execute("SELECT DISTINCT fn FROM entries")}
+        assert "lru_old" not in names and "pinned" not in names
+
+    bulk = unittest.mock.Mock(side_effect=lambda keys: [k * 10 for k in keys])
+    bulk_cached = batched_lru_cache(maxsize=4)(bulk)
+    assert bulk_cached([1, 2, 1, 3]) == [10, 20, 10, 30]
+    bulk.assert_called_once_with([1, 2, 3])
+    assert bulk_cached([3, 4, 2]) == [30, 40, 20]
+    assert bulk.call_args.args == ([4],)
+    assert bulk_cached([2, 3]) == [20, 30]
+    assert bulk.call_count == 2
+    assert bulk_cached.cache_info()[:2] == (5, 4)
+    assert bulk_cached([]) == []
+    assert bulk.call_count == 2
+
+    cold = batched_lru_cache(lambda keys: keys)
+    assert cold([1, 1]) == [1, 1]
+    assert cold.cache_info()[:2] == (1, 1)
+
+    broken_bulk = batched_lru_cache(lambda keys: keys[:1])
+    try:
+        broken_bulk([1, 2])
+        assert False, "result length must match the number of misses"
+    except ValueError:
+        pass
@@ -0,0 +1,225 @@
+import functools
+import importlib
+import importlib.util
+import random
+import sys
+import threading
+import time
+import timeit
+from pathlib import Path
+from typing import Callable
+
+# Имя модуля начинается с цифры, обычный import не подойдёт
+lru = importlib.import_module("18_lru_cache")
+
+
+def _load_mp():
+    # 10_MP.py лежит в другом модуле курса и не в sys.path
+    path = Path(__file__).resolve().parents[2] / "module_4" / "tasks" / "10_MP.py"
+    spec = importlib.util.spec_from_file_location("10_MP", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["10_MP"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+mp = _load_mp()
+
+
+# Функции уровня модуля, чтобы пул мог передать их воркерам по имени
+@lru.lru_cache(maxsize=1024)
+def process_number_private(n):
+    return mp.process_number(n)
+
+
+@lru.lru_cache(maxsize=1024, backend="shared")
+def process_number_shared(n):
+    return mp.process_number(n)
+
+
+def _work(x: int) -> int:
+    # Имитация недешёвой функции: промах должен стоить заметно больше попадания
+    total = 0
+    for i in range(200):
+        total += (x * i) % 7
+    return total
+
+
+def _run_threads(
+    func: Callable[[int], int], threads: int, calls: int, keys: list
+) -> float:
+    barrier = threading.Barrier(threads + 1)
+    per_thread = calls // threads
+
+    def target(seed: int):
+        rnd = random.Random(seed)
+        chunk = [rnd.choice(keys) for _ in range(per_thread)]
+        barrier.wait()
+        for k in chunk:
+            func(k)
+
+    pool = [threading.Thread(target=target, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def contention_benchmark(
+    calls: int = 200_000, key_space: int = 512, maxsize: int = 256
+):
+    keys = list(range(key_space))
+    print(
+        f"{'Потоки':<8} {'functools (ops/s)':<20} "
+        f"{'thread_safe (ops/s)':<20} {'Отношение':<10}"
+    )
+    print("-" * 60)
+
+    for threads in (1, 2, 4, 8, 16, 32):
+        std = functools.lru_cache(maxsize=maxsize)(_work)
+        ours = lru.lru_cache(maxsize=maxsize, thread_safe=True)(_work)
+
+        std_ops = _run_threads(std, threads, calls, keys)
+        our_ops = _run_threads(ours, threads, calls, keys)
+        ratio = our_ops / std_ops
+        print(f"{threads:<8} {std_ops:<20,.0f} {our_ops:<20,.0f} {ratio:<10.2f}x")
+
+
+def zipf_trace(n: int, key_space: int, s: float = 1.0, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    weights = [1 / (i**s) for i in range(1, key_space + 1)]
+    keys = list(range(key_space))
+    rnd.shuffle(keys)  # чтобы популярность не совпадала с порядком ключей
+    return rnd.choices(keys, weights=weights, k=n)
+
+
+def scan_trace(n: int, key_space: int, scan_len: int, seed: int = 0) -> list:
+    # Zipf-нагрузка, которую периодически перебивает длинный последовательный скан
+    base = zipf_trace(n, key_space, seed=seed)
+    trace = []
+    next_scan = key_space
+    for i, k in enumerate(base):
+        trace.append(k)
+        if i % (scan_len * 4) == 0 and i:
+            trace.extend(range(next_scan, next_scan + scan_len))
+            next_scan += scan_len
+    return trace
+
+
+def replay(make_cached: Callable, trace: list) -> tuple:
+    misses = 0
+
+    def miss(k):
+        nonlocal misses
+        misses += 1
+        return k
+
+    cached = make_cached(miss)
+    start = time.perf_counter_ns()
+    for k in trace:
+        cached(k)
+    elapsed = time.perf_counter_ns() - start
+    return 1 - misses / len(trace), elapsed / len(trace)
+
+
+def hit_ratio_benchmark(n: int = 200_000, key_space: int = 20_000, maxsize: int = 1000):
+    traces = {
+        "zipf s=0.8": zipf_trace(n, key_space, s=0.8),
+        "zipf s=1.0": zipf_trace(n, key_space, s=1.0),
+        "zipf + scan": scan_trace(n, key_space, scan_len=maxsize * 2),
+    }
+    variants = {
+        "functools": lambda f: functools.lru_cache(maxsize=maxsize)(f),
+        "lru": lambda f: lru.lru_cache(maxsize=maxsize, policy="lru")(f),
+        "lfu": lambda f: lru.lru_cache(maxsize=maxsize, policy="lfu")(f),
+        "arc": lambda f: lru.lru_cache(maxsize=maxsize, policy="arc")(f),
+        "tinylfu": lambda f: lru.lru_cache(maxsize=maxsize, policy="tinylfu")(f),
+    }
+
+    for trace_name, trace in traces.items():
+        print(f"\n{trace_name}: {len(trace)} обращений, maxsize={maxsize}")
+        print(f"{'Политика':<12} {'Hit ratio':<12} {'ns/op':<10}")
+        print("-" * 34)
+        for name, make_cached in variants.items():
+            ratio, ns = replay(make_cached, trace)
+            print(f"{name:<12} {ratio:<12.4f} {ns:<10.0f}")
+
+
+def _add(a, b):
+    return a + b
+
+
+def _add_positional(a, b, /):
+    return a + b
+
+
+def _square(x):
+    return x * x
+
+
+def overhead_benchmark(number: int = 500_000):
+    # Накладные расходы на попадание для дешёвой функции вроде sum_:
+    # все вызовы идут по одному и тому же закэшированному ключу
+    cases = {
+        "без кэша: _add(1, 2)": (_add, lambda f: f(1, 2)),
+        "functools: _add(1, 2)": (functools.lru_cache()(_add), lambda f: f(1, 2)),
+        "lru_cache: _add(1, 2)": (lru.lru_cache()(_add), lambda f: f(1, 2)),
+        "lru_cache(typed): _add(1, 2)": (
+            lru.lru_cache(typed=True)(_add),
+            lambda f: f(1, 2),
+        ),
+        "functools: _add(1, b=2)": (functools.lru_cache()(_add), lambda f: f(1, b=2)),
+        "lru_cache: _add(1, b=2)": (lru.lru_cache()(_add), lambda f: f(1, b=2)),
+        "functools: _add_positional": (
+            functools.lru_cache()(_add_positional),
+            lambda f: f(1, 2),
+        ),
+        "lru_cache: _add_positional": (
+            lru.lru_cache()(_add_positional),
+            lambda f: f(1, 2),
+        ),
+        "functools: _square(7)": (functools.lru_cache()(_square), lambda f: f(7)),
+        "lru_cache: _square(7)": (lru.lru_cache()(_square), lambda f: f(7)),
+    }
+
+    print(f"\n{'Вариант':<32} {'ns/вызов':<10}")
+    print("-" * 42)
+    for name, (func, call) in cases.items():
+        call(func)
+        elapsed = min(timeit.repeat(lambda: call(func), number=number, repeat=3))
+        print(f"{name:<32} {elapsed / number * 1e9:<10.0f}")
+
+
+def shared_backend_benchmark(n: int = 100_000):
+    # Каждый запуск пула форкает новые процессы, так что приватные кэши
+    # воркеров начинают с нуля, а общий перед замером очищается вручную
+    random.seed(42)
+    data = mp.generate_data(n)
+    variants = {
+        "без кэша": mp.process_number,
+        "кэш в процессе": process_number_private,
+        "общий кэш": process_number_shared,
+    }
+
+    print(f"\n{'ProcessPool':<20} {'Время (сек)':<12} {'Ускорение':<10}")
+    print("-" * 42)
+    timing = {}
+    for name, func in variants.items():
+        if hasattr(func, "cache_clear"):
+            func.cache_clear()
+        start = time.perf_counter()
+        mp.process_with_processpool(data, func)
+        timing[name] = time.perf_counter() - start
+        speedup = timing["без кэша"] / timing[name]
+        print(f"{name:<20} {timing[name]:<12.2f} {speedup:<10.2f}x")
+
+
+if __name__ == "__main__":
+    overhead_benchmark()
+    contention_benchmark()
+    hit_ratio_benchmark()
+    shared_backend_benchmark()
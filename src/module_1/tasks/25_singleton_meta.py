@@ -1,17 +1,533 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+
+
 class SingletonMeta(type):
     _instances = {}
+    # Блокировка на класс, RLock — чтобы __init__ одного синглтона мог
+    # создавать другие. Вызов своего же класса из __init__ создал бы второй
+    # экземпляр, поэтому он отмечается в _constructing и падает с ошибкой
+    _locks = {}
+    _locks_guard = threading.Lock()
+    _pending = {}
+    _constructing = set()
+    # Классы, у экземпляра которых ainit() уже отработал
+    _initialized = set()
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
-        return cls._instances[cls]
+        # После инициализации — один поиск в словаре без блокировок
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
+        with cls._lock_for():
+            instance = cls._instances.get(cls)
+            if instance is None:
+                # Блокировку держит этот поток, значит класс в наборе —
+                # только если мы внутри его же __init__
+                if cls in cls._constructing:
+                    raise RuntimeError(
+                        f"{cls.__name__} is called from its own __init__"
+                    )
+                cls._constructing.add(cls)
+                try:
+                    instance = super().__call__(*args, **kwargs)
+                finally:
+                    cls._constructing.discard(cls)
+                cls._instances[cls] = instance
+        return instance
+
+    def _lock_for(cls):
+        lock = cls._locks.get(cls)
+        if lock is None:
+            with cls._locks_guard:
+                lock = cls._locks.setdefault(cls, threading.RLock())
+        return lock
+
+    async def instance(cls, *args, **kwargs):
+        # Асинхронная инициализация: после обычного __init__ ждём ainit(),
+        # если он есть. Все одновременные вызовы ждут одну и ту же задачу,
+        # при ошибке задача забывается и следующий вызов пробует снова
+        instance = cls._instances.get(cls)
+        if instance is not None and cls in cls._initialized:
+            return instance
+
+        task = cls._pending.get(cls)
+        if task is None:
+            task = asyncio.ensure_future(cls._create_async(args, kwargs))
+            cls._pending[cls] = task
+        return await asyncio.shield(task)
+
+    async def _create_async(cls, args, kwargs):
+        # Экземпляр строится тем же __call__ (под блокировкой класса и с той
+        # же защитой от повторного входа), и ainit() вызывается у того, что
+        # лежит в _instances, — в том числе созданного синхронно раньше
+        try:
+            instance = cls(*args, **kwargs)
+            if hasattr(instance, "ainit"):
+                await instance.ainit()
+            cls._initialized.add(cls)
+            return instance
+        finally:
+            cls._pending.pop(cls, None)
+
+    @staticmethod
+    def reset_after_fork():
+        # Дочерний процесс не должен пользоваться объектами родителя
+        # (соединениями, сокетами), а блокировки могли быть захвачены
+        # другими потоками родителя в момент fork
+        SingletonMeta._instances.clear()
+        SingletonMeta._locks.clear()
+        SingletonMeta._pending.clear()
+        SingletonMeta._constructing.clear()
+        SingletonMeta._initialized.clear()
+        SingletonMeta._locks_guard = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SingletonMeta.reset_after_fork)
 
 
 class DB(metaclass=SingletonMeta):
     pass
 
 
+PoolMetrics = namedtuple(
+    "PoolMetrics",
+    [
+        "size",
+        "idle",
+        "in_use",
+        "checkouts",
+        "timeouts",
+        "discarded",
+        "wait_total",
+        "wait_p50",
+        "wait_p95",
+        "wait_p99",
+        "hold_p50",
+        "hold_p95",
+        "hold_p99",
+    ],
+)
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class DBPool(metaclass=SingletonMeta):
+    # Ограниченный пул соединений SQLite, один на класс (для второй базы —
+    # подкласс). Соединение проверяется health_check при каждой выдаче,
+    # сломанное закрывается и заменяется новым. Метрики хранят последние
+    # sample_size замеров ожидания и удержания соединения.
+    _async_init = False
+
+    def __init__(
+        self,
+        database=":memory:",
+        min_size=1,
+        max_size=10,
+        timeout=5.0,
+        health_check="SELECT 1",
+        sample_size=10_000,
+        **connect_kwargs,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                "Pool sizes must satisfy 0 <= min_size <= max_size, 1 <= max_size"
+            )
+
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        # Соединение переходит между потоками, но в каждый момент
+        # принадлежит одному заёмщику
+        self.connect_kwargs = {"check_same_thread": False, **connect_kwargs}
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._checked_out = {}
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._waits = deque(maxlen=sample_size)
+        self._holds = deque(maxlen=sample_size)
+
+        if not self._async_init:
+            self._fill()
+
+    def _fill(self):
+        while self._size < self.min_size:
+            with self._condition:
+                self._size += 1
+            self._idle.append(self._connect())
+
+    def _connect(self):
+        try:
+            return sqlite3.connect(self.database, **self.connect_kwargs)
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _healthy(self, connection):
+        try:
+            connection.execute(self.health_check).fetchall()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, connection):
+        connection.close()
+        with self._condition:
+            self._size -= 1
+            self._discarded += 1
+            self._condition.notify()
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    if self._closed:
+                        raise RuntimeError("Pool is closed")
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        if not self._idle and self._size >= self.max_size:
+                            # timeout=0 — проба без ожидания, это не таймаут
+                            self._timeouts += timeout > 0
+                            raise PoolTimeout(
+                                f"No free connection in {timeout:.3f}s "
+                                + f"(max_size={self.max_size})"
+                            )
+                if self._closed:
+                    raise RuntimeError("Pool is closed")
+                connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    # Место в пуле занимаем под блокировкой, а само
+                    # подключение открываем уже без неё
+                    self._size += 1
+
+            if connection is None:
+                connection = self._connect()
+            elif not self._healthy(connection):
+                self._discard(connection)
+                continue
+            break
+
+        now = time.perf_counter()
+        with self._condition:
+            self._checkouts += 1
+            self._wait_total += now - start
+            self._waits.append(now - start)
+            self._checked_out[id(connection)] = now
+        return connection
+
+    def release(self, connection):
+        now = time.perf_counter()
+        with self._condition:
+            # Повторный возврат или чужое соединение в очередь попасть не
+            # должны: иначе его выдадут двум заёмщикам сразу
+            taken = self._checked_out.pop(id(connection), None)
+            if taken is None:
+                raise ValueError("Connection is not checked out from this pool")
+            self._holds.append(now - taken)
+            closed = self._closed
+
+        if closed:
+            self._discard(connection)
+            return
+        try:
+            # Незавершённая транзакция заёмщика не должна достаться следующему
+            connection.rollback()
+        except sqlite3.Error:
+            self._discard(connection)
+            return
+        with self._condition:
+            if not self._closed:
+                self._idle.append(connection)
+                self._condition.notify()
+                return
+        self._discard(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._condition.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+    def metrics(self):
+        with self._condition:
+            waits, holds = list(self._waits), list(self._holds)
+            return PoolMetrics(
+                self._size,
+                len(self._idle),
+                len(self._checked_out),
+                self._checkouts,
+                self._timeouts,
+                self._discarded,
+                self._wait_total,
+                percentile(waits, 0.50),
+                percentile(waits, 0.95),
+                percentile(waits, 0.99),
+                percentile(holds, 0.50),
+                percentile(holds, 0.95),
+                percentile(holds, 0.99),
+            )
+
+
+class AsyncDBPool(DBPool):
+    # Тот же пул для asyncio: соединения открываются в ainit (await
+    # AsyncDBPool.instance()), а блокирующие вызовы SQLite и ожидание
+    # свободного соединения уходят в поток, не останавливая цикл событий
+    _async_init = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Ожидающие свободного соединения блокируют свой поток, поэтому у
+        # них отдельный пул потоков: иначе они займут общий, и запросы с
+        # возвратом соединений, которых они ждут, не смогут выполниться
+        self._acquire_executor = ThreadPoolExecutor(thread_name_prefix="DBPool")
+
+    async def ainit(self):
+        await asyncio.to_thread(self._fill)
+
+    async def acquire_async(self, timeout=None):
+        # Ожидание, подключение и health_check — всё в потоке. Если вызов
+        # отменят, поток всё равно может получить соединение: тогда оно
+        # вернётся в пул, как только поток закончит
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self._acquire_executor, self.acquire, timeout)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, task):
+        if not task.cancelled() and task.exception() is None:
+            task.get_loop().run_in_executor(None, self.release, task.result())
+
+    async def release_async(self, connection):
+        # rollback тоже запрос к базе; shield — чтобы повторная отмена не
+        # оставила соединение занятым
+        await asyncio.shield(asyncio.to_thread(self.release, connection))
+
+    @asynccontextmanager
+    async def connection_async(self, timeout=None):
+        connection = await self.acquire_async(timeout)
+        try:
+            yield connection
+        finally:
+            await self.release_async(connection)
+
+    def close(self):
+        super().close()
+        self._acquire_executor.shutdown(wait=False)
+
+    async def execute(self, sql, parameters=(), timeout=None):
+        async with self.connection_async(timeout) as connection:
+            return await asyncio.to_thread(
+                lambda: connection.execute(sql, parameters).fetchall()
+            )
+
+
 if __name__ == "__main__":
     db1 = DB()
     db2 = DB()
     assert db1 is db2
+
+    class Slow(metaclass=SingletonMeta):
+        created = 0
+
+        def __init__(self):
+            threading.Event().wait(0.01)
+            Slow.created += 1
+
+    threads = [threading.Thread(target=Slow) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert Slow.created == 1
+
+    class SelfReferencing(metaclass=SingletonMeta):
+        created = 0
+
+        def __init__(self):
+            SelfReferencing.created += 1
+            self.other = SelfReferencing()
+
+    try:
+        SelfReferencing()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("reentrant construction must fail")
+    assert SelfReferencing.created == 1
+    assert SelfReferencing not in SingletonMeta._instances
+    assert SelfReferencing not in SingletonMeta._constructing
+
+    class AsyncDB(metaclass=SingletonMeta):
+        initialized = 0
+
+        async def ainit(self):
+            await asyncio.sleep(0.01)
+            AsyncDB.initialized += 1
+
+    async def main():
+        return await asyncio.gather(*(AsyncDB.instance() for _ in range(10)))
+
+    instances = asyncio.run(main())
+    assert all(instance is instances[0] for instance in instances)
+    assert AsyncDB.initialized == 1
+    assert AsyncDB() is instances[0]
+
+    # Созданный синхронно синглтон получает свой ainit при первом instance()
+    class SyncFirst(metaclass=SingletonMeta):
+        initialized = 0
+
+        async def ainit(self):
+            SyncFirst.initialized += 1
+
+    sync_first = SyncFirst()
+    assert asyncio.run(SyncFirst.instance()) is sync_first
+    assert asyncio.run(SyncFirst.instance()) is sync_first
+    assert SyncFirst.initialized == 1
+
+    # Синхронный вызов из потока, пока идёт ainit, получает тот же объект
+    class Racing(metaclass=SingletonMeta):
+        created = 0
+        initialized = 0
+
+        def __init__(self):
+            Racing.created += 1
+
+        async def ainit(self):
+            await asyncio.sleep(0.05)
+            Racing.initialized += 1
+
+    async def race():
+        task = asyncio.ensure_future(Racing.instance())
+        await asyncio.sleep(0.01)
+        from_thread = await asyncio.to_thread(Racing)
+        return await task, from_thread
+
+    async_built, sync_built = asyncio.run(race())
+    assert async_built is sync_built
+    assert (Racing.created, Racing.initialized) == (1, 1)
+
+    if hasattr(os, "fork"):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, b"1" if DB() is not db1 else b"0")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.read(read, 1) == b"1"
+        assert DB() is db1
+
+    pool = DBPool(min_size=1, max_size=2, timeout=0.05)
+    assert DBPool() is pool
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+        assert pool.metrics().in_use == 2
+        try:
+            pool.acquire()
+        except PoolTimeout:
+            pass
+        else:
+            raise AssertionError("pool must not grow past max_size")
+        first.close()  # сломанное соединение вернётся в пул
+    metrics = pool.metrics()
+    assert (metrics.size, metrics.in_use, metrics.timeouts) == (1, 0, 1)
+    with pool.connection() as connection:
+        assert connection.execute("SELECT 1").fetchone() == (1,)
+    assert pool.metrics().discarded == 1
+
+    connection = pool.acquire()
+    pool.release(connection)
+    try:
+        pool.release(connection)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("double release must fail")
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    assert pool.metrics().in_use == 2
+    pool.release(first)
+    pool.release(second)
+
+    async def use_async_pool():
+        pool = await AsyncDBPool.instance(min_size=2, max_size=2)
+        rows = await asyncio.gather(*(pool.execute("SELECT ?", (i,)) for i in range(8)))
+        return pool, rows
+
+    async_pool, rows = asyncio.run(use_async_pool())
+    assert rows == [[(i,)] for i in range(8)]
+    assert async_pool.metrics().checkouts == 8
+    assert async_pool.metrics().size == 2
+
+    class FilledPool(AsyncDBPool):
+        pass
+
+    sync_pool = FilledPool(min_size=2, max_size=2)
+    assert sync_pool.metrics().size == 0
+    assert asyncio.run(FilledPool.instance()) is sync_pool
+    assert sync_pool.metrics().size == 2
+
+    class SinglePool(AsyncDBPool):
+        pass
+
+    async def cancel_waiter():
+        # Отменённый ожидающий не должен увести соединение из пула
+        pool = await SinglePool.instance(max_size=1)
+        held = await pool.acquire_async()
+        try:
+            await asyncio.wait_for(pool.acquire_async(timeout=1), 0.05)
+        except TimeoutError:
+            pass
+        else:
+            raise AssertionError("pool must not grow past max_size")
+        await pool.release_async(held)
+        async with pool.connection_async(timeout=2) as connection:
+            assert connection.execute("SELECT 1").fetchone() == (1,)
+        await asyncio.sleep(0.05)
+        return pool.metrics()
+
+    metrics = asyncio.run(cancel_waiter())
+    assert (metrics.size, metrics.in_use, metrics.idle) == (1, 0, 1)
@@ -0,0 +1,173 @@
+import importlib
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+
+# Имя модуля начинается с цифры, обычный import не подойдёт
+singleton = importlib.import_module("25_singleton_meta")
+
+
+class UnsafeSingletonMeta(type):
+    # Прежняя реализация: проверка и создание без блокировки
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if cls not in cls._instances:
+            cls._instances[cls] = super().__call__(*args, **kwargs)
+        return cls._instances[cls]
+
+
+def make_db(meta, init_seconds):
+    class DB(metaclass=meta):
+        created = 0
+
+        def __init__(self):
+            # Дорогая инициализация: подключение, прогрев и т.п.
+            time.sleep(init_seconds)
+            DB.created += 1
+
+    return DB
+
+
+def stress(meta, threads=32, calls=20_000, init_seconds=0.01):
+    DB = make_db(meta, init_seconds)
+    barrier = threading.Barrier(threads + 1)
+    seen = set()
+
+    def target():
+        barrier.wait()
+        for _ in range(calls // threads):
+            seen.add(id(DB()))
+
+    pool = [threading.Thread(target=target) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return DB.created, len(seen), elapsed
+
+
+def stress_benchmark():
+    print(
+        f"{'Метакласс':<22} {'Создано':<10} {'Разных объектов':<18} {'Время (сек)':<12}"
+    )
+    print("-" * 64)
+    for label, meta in (
+        ("без блокировки", UnsafeSingletonMeta),
+        ("SingletonMeta", singleton.SingletonMeta),
+    ):
+        created, distinct, elapsed = stress(meta)
+        print(f"{label:<22} {created:<10} {distinct:<18} {elapsed:<12.3f}")
+
+
+def fast_path_benchmark(number=1_000_000):
+    # Стоимость вызова уже созданного синглтона
+    print(f"\n{'Метакласс':<22} {'нс/вызов':<10}")
+    print("-" * 32)
+    for label, meta in (
+        ("без блокировки", UnsafeSingletonMeta),
+        ("SingletonMeta", singleton.SingletonMeta),
+    ):
+        DB = make_db(meta, 0)
+        DB()
+        elapsed = min(timeit.repeat(DB, number=number, repeat=5))
+        print(f"{label:<22} {elapsed / number * 1e9:<10.0f}")
+
+
+def worker_db(_):
+    return os.getpid(), id(singleton.DB())
+
+
+def fork_benchmark(workers=4):
+    # Родитель создаёт DB до запуска пула: каждому воркеру должен
+    # достаться свой экземпляр, а не унаследованный через fork. Ссылка
+    # держит родительский объект живым и в детях, так что новый экземпляр
+    # не может случайно занять тот же адрес
+    parent_db = singleton.DB()
+    parent = id(parent_db)
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        results = pool.map(worker_db, range(workers * 4))
+
+    inherited = sum(1 for _, db in results if db == parent)
+    per_process = {}
+    for pid, db in results:
+        per_process.setdefault(pid, set()).add(db)
+    print(
+        f"\nfork: процессов {len(per_process)}, "
+        f"унаследованных экземпляров {inherited}, "
+        f"экземпляров на процесс {max(map(len, per_process.values()))}"
+    )
+
+
+def run_requests(checkout, threads, requests):
+    # Запрос держит соединение на время SQL и ещё ~1 мс «прочего I/O»
+    # внутри транзакции — как обработчик, который ходит во внешний сервис
+    def target():
+        for i in range(requests):
+            with checkout() as connection:
+                connection.execute("SELECT count(*) FROM items WHERE id < ?", (i,))
+                time.sleep(0.001)
+
+    pool = [threading.Thread(target=target) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start
+
+
+def pool_benchmark(threads=16, requests=50, max_size=8):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        with sqlite3.connect(path) as connection:
+            connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            connection.executemany(
+                "INSERT INTO items VALUES (?)", ((i,) for i in range(10_000))
+            )
+
+        shared = sqlite3.connect(path, check_same_thread=False)
+        lock = threading.Lock()
+
+        @contextmanager
+        def single():
+            with lock:
+                yield shared
+
+        single_time = run_requests(single, threads, requests)
+        shared.close()
+
+        pool = singleton.DBPool(path, min_size=2, max_size=max_size)
+        pool_time = run_requests(pool.connection, threads, requests)
+        metrics = pool.metrics()
+        pool.close()
+
+    print(f"\n{'Соединения':<24} {'Время (сек)':<12} {'Ускорение':<10}")
+    print("-" * 46)
+    print(f"{'одно под блокировкой':<24} {single_time:<12.3f} {1.0:<10.2f}x")
+    label = f"DBPool(max_size={max_size})"
+    print(f"{label:<24} {pool_time:<12.3f} {single_time / pool_time:<10.2f}x")
+    print(
+        f"выдач {metrics.checkouts}, соединений {metrics.size}, "
+        f"ожидание p50/p95/p99 {metrics.wait_p50 * 1e3:.2f}/"
+        f"{metrics.wait_p95 * 1e3:.2f}/{metrics.wait_p99 * 1e3:.2f} мс, "
+        f"удержание p50/p95/p99 {metrics.hold_p50 * 1e3:.2f}/"
+        f"{metrics.hold_p95 * 1e3:.2f}/{metrics.hold_p99 * 1e3:.2f} мс"
+    )
+
+
+if __name__ == "__main__":
+    stress_benchmark()
+    fast_path_benchmark()
+    if hasattr(os, "fork"):
+        fork_benchmark()
+    pool_benchmark()
@@ -1,4 +1,13 @@
+import argparse
+import builtins
+import importlib
+import sys
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
 from datetime import datetime
+from importlib.abc import MetaPathFinder
 
 
 class CreatedAt(type):
@@ -12,6 +21,315 @@ class Base(metaclass=CreatedAt):
     pass
 
 
-a = Base()
+ClassRecord = namedtuple(
+    "ClassRecord", ["module", "qualname", "stack", "seconds", "allocated"]
+)
+ModuleRecord = namedtuple(
+    "ModuleRecord",
+    ["module", "seconds", "self_seconds", "allocated", "classes", "class_seconds"],
+)
 
-print(a.created_at)
+
+class CreationProfiler:
+    # Профиль холодного старта: время и память на импорт каждого модуля и
+    # создание каждого класса. Импорты ловит перехватчик в sys.meta_path,
+    # классы — подменённый builtins.__build_class__ (all_classes=True, тело
+    # класса плюс метакласс) или ProfiledMeta (только __new__ метакласса).
+    # Кадры складываются в стек «модуль;вложенный модуль;Класс», собственное
+    # время кадра — без детей, как в folded-формате для flamegraph.pl.
+    active = None
+
+    def __init__(self, all_classes=True, imports=True, trace_memory=True):
+        self.all_classes = all_classes
+        self.imports = imports
+        self.trace_memory = trace_memory
+        self.classes = []
+        # имя модуля -> [время, собственное время, память]
+        self.modules = {}
+        # стек кадров -> [собственное время, собственная память]
+        self.folded = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._build_class = None
+        self._finder = None
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if CreationProfiler.active is not None:
+            raise RuntimeError("Another CreationProfiler is already running")
+        CreationProfiler.active = self
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.all_classes:
+            self._build_class = builtins.__build_class__
+            builtins.__build_class__ = self._profiled_build_class
+        if self.imports:
+            self._finder = ImportTimer(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def stop(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+        if self._build_class is not None:
+            builtins.__build_class__ = self._build_class
+            self._build_class = None
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        CreationProfiler.active = None
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, name):
+        # Кадр: [имя, начало, память в начале, время детей, память детей]
+        stack = self._stack()
+        stack.append([name, time.perf_counter(), self._memory(), 0.0, 0])
+        return stack
+
+    def _pop(self, stack):
+        end, memory = time.perf_counter(), self._memory()
+        path = tuple(frame[0] for frame in stack)
+        name, start, memory_start, child_seconds, child_memory = stack.pop()
+        seconds, allocated = end - start, memory - memory_start
+        if stack:
+            stack[-1][3] += seconds
+            stack[-1][4] += allocated
+
+        with self._lock:
+            totals = self.folded.setdefault(path, [0.0, 0])
+            totals[0] += seconds - child_seconds
+            totals[1] += allocated - child_memory
+        return path, seconds, seconds - child_seconds, allocated
+
+    def record_class(self, module, qualname, path, seconds, allocated):
+        with self._lock:
+            self.classes.append(ClassRecord(module, qualname, path, seconds, allocated))
+
+    def _profiled_build_class(self, func, name, *args, **kwargs):
+        stack = self._push(getattr(func, "__qualname__", name))
+        try:
+            cls = self._build_class(func, name, *args, **kwargs)
+        finally:
+            path, seconds, _, allocated = self._pop(stack)
+        self.record_class(
+            getattr(cls, "__module__", func.__module__),
+            getattr(cls, "__qualname__", name),
+            path,
+            seconds,
+            allocated,
+        )
+        return cls
+
+    def time_import(self, name, exec_module, module):
+        stack = self._push(name)
+        try:
+            exec_module(module)
+        finally:
+            _, seconds, self_seconds, allocated = self._pop(stack)
+            with self._lock:
+                totals = self.modules.setdefault(name, [0.0, 0.0, 0])
+                totals[0] += seconds
+                totals[1] += self_seconds
+                totals[2] += allocated
+
+    def report(self):
+        # Модули по убыванию полного времени импорта. Классы, созданные вне
+        # отслеженного импорта (в __main__, через exec), попадают в строку
+        # своего __module__ с нулевым временем импорта
+        classes = {}
+        for record in self.classes:
+            count = classes.setdefault(record.module, [0, 0.0])
+            count[0] += 1
+            count[1] += record.seconds
+
+        rows = []
+        for module in self.modules.keys() | classes.keys():
+            seconds, self_seconds, allocated = self.modules.get(module, (0.0, 0.0, 0))
+            count, class_seconds = classes.get(module, (0, 0.0))
+            rows.append(
+                ModuleRecord(
+                    module, seconds, self_seconds, allocated, count, class_seconds
+                )
+            )
+        rows.sort(key=lambda row: (row.seconds, row.class_seconds), reverse=True)
+        return rows
+
+    def slowest_classes(self, limit=20):
+        return sorted(self.classes, key=lambda record: record.seconds, reverse=True)[
+            :limit
+        ]
+
+    def write_folded(self, path, metric="seconds"):
+        # Строка «кадр;кадр;кадр значение»: время в микросекундах или
+        # память в байтах. Формат читают flamegraph.pl, speedscope, inferno
+        if metric not in ("seconds", "allocated"):
+            raise ValueError(f"metric must be 'seconds' or 'allocated', got '{metric}'")
+
+        index = 0 if metric == "seconds" else 1
+        scale = 1e6 if metric == "seconds" else 1
+        with open(path, "w") as f:
+            for stack, totals in sorted(self.folded.items()):
+                value = round(totals[index] * scale)
+                if value > 0:
+                    frames = ";".join(frame.replace(";", ":") for frame in stack)
+                    f.write(f"{frames} {value}\n")
+
+    def print_report(self, limit=20):
+        print(
+            f"{'Модуль':<40} {'Импорт (мс)':>12} {'Своё (мс)':>10} "
+            f"{'Память (КБ)':>12} {'Классов':>8} {'Классы (мс)':>12}"
+        )
+        print("-" * 99)
+        for row in self.report()[:limit]:
+            print(
+                f"{row.module:<40} {row.seconds * 1e3:>12.2f} "
+                f"{row.self_seconds * 1e3:>10.2f} {row.allocated / 1024:>12.1f} "
+                f"{row.classes:>8} {row.class_seconds * 1e3:>12.2f}"
+            )
+
+        print(f"\n{'Класс':<60} {'Время (мс)':>11} {'Память (КБ)':>12}")
+        print("-" * 84)
+        for record in self.slowest_classes(limit):
+            name = f"{record.module}.{record.qualname}"
+            print(
+                f"{name:<60} {record.seconds * 1e3:>11.3f} "
+                f"{record.allocated / 1024:>12.1f}"
+            )
+
+
+class ImportTimer(MetaPathFinder):
+    # Спрашивает остальные искатели из sys.meta_path и подменяет загрузчик
+    # найденного модуля обёрткой, которая замеряет exec_module
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = TimedLoader(spec.loader, self.profiler)
+        return spec
+
+
+class TimedLoader:
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Модулю возвращается настоящий загрузчик: обёртка нужна только на
+        # время импорта и не должна быть видна importlib.resources и т.п.
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.profiler.time_import(module.__name__, self.loader.exec_module, module)
+
+
+class ProfiledMeta(type):
+    # Метакласс-примесь для выборочного профилирования, когда подмена
+    # __build_class__ не нужна (CreationProfiler(all_classes=False)):
+    #   class ProfiledSerializerMeta(ProfiledMeta, SerializerMeta): ...
+    # Замеряется только __new__ метакласса — например, кодогенерация
+    def __new__(mcs, name, bases, attrs, **kwargs):
+        profiler = CreationProfiler.active
+        if profiler is None or profiler.all_classes:
+            return super().__new__(mcs, name, bases, attrs, **kwargs)
+
+        qualname = attrs.get("__qualname__", name)
+        stack = profiler._push(qualname)
+        try:
+            cls = super().__new__(mcs, name, bases, attrs, **kwargs)
+        finally:
+            path, seconds, _, allocated = profiler._pop(stack)
+        profiler.record_class(cls.__module__, qualname, path, seconds, allocated)
+        return cls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Class creation and import profiler")
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=[
+            "additional_task_serializer_meta",
+            "additional_task_registry_meta",
+            "additional_task_registry_handlers",
+        ],
+        help="modules to import under the profiler",
+    )
+    parser.add_argument("--limit", type=int, default=20, help="rows per table")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--folded", help="write folded stacks (microseconds) here")
+    parser.add_argument(
+        "--folded-memory", help="write folded stacks (allocated bytes) here"
+    )
+    args = parser.parse_args(argv)
+
+    with CreationProfiler(trace_memory=not args.no_memory) as profiler:
+        for module in args.modules:
+            importlib.import_module(module)
+
+    profiler.print_report(args.limit)
+    if args.folded:
+        profiler.write_folded(args.folded)
+    if args.folded_memory:
+        profiler.write_folded(args.folded_memory, metric="allocated")
+    return profiler
+
+
+if __name__ == "__main__":
+    a = Base()
+    print(a.created_at)
+
+    profiler = main()
+    modules = {row.module: row for row in profiler.report()}
+    assert modules["additional_task_serializer_meta"].classes > 0
+    assert modules["additional_task_registry_handlers"].seconds > 0
+    assert builtins.__build_class__ is not profiler._profiled_build_class
+    assert CreationProfiler.active is None
+    # Классы лежат в стеке под модулем, в котором созданы
+    assert ("additional_task_serializer_meta", "BaseSerializer") in profiler.folded
+
+    class Plain(metaclass=ProfiledMeta):
+        pass
+
+    with CreationProfiler(all_classes=False, imports=False) as selective:
+
+        class Profiled(metaclass=ProfiledMeta):
+            pass
+
+        class NotProfiled:
+            pass
+
+    assert [record.qualname for record in selective.classes] == [Profiled.__qualname__]
@@ -0,0 +1,285 @@
+import asyncio
+import inspect
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
+from pathlib import Path
+
+from additional_task_registry_meta import Handler, RegistryMeta
+
+HandlerStats = namedtuple(
+    "HandlerStats",
+    [
+        "messages",
+        "batches",
+        "seconds",
+        "throughput",
+        "mean_latency",
+        "max_batch_latency",
+    ],
+)
+
+MODES = ("sync", "threads", "asyncio")
+
+
+class Dispatcher:
+    # Рассылает пары (имя обработчика, сообщение): группирует сообщения по
+    # обработчику, режет группы на пачки по batch_size и отдаёт пачку
+    # handle_batch, если он есть, иначе handle по одному. Экземпляры
+    # обработчиков создаются один раз на поток и переиспользуются: пул
+    # потоков живёт вместе с диспетчером, закрывается close() или with.
+    def __init__(self, mode="sync", batch_size=1000, max_workers=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got '{mode}'")
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        self.mode = mode
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        # имя -> [сообщений, пачек, секунд, самая долгая пачка]
+        self._counters = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def executor(self):
+        # Один пул на все вызовы dispatch и куски dispatch_stream: иначе
+        # обработчики из threading.local пропадают вместе с потоками
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="Dispatcher"
+                )
+            return self._executor
+
+    def handler(self, name):
+        instances = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        if name not in instances:
+            instances[name] = Handler.get_by_name(name)()
+        return instances[name]
+
+    def _record(self, name, count, elapsed):
+        with self._lock:
+            counters = self._counters.setdefault(name, [0, 0, 0.0, 0.0])
+            counters[0] += count
+            counters[1] += 1
+            counters[2] += elapsed
+            counters[3] = max(counters[3], elapsed)
+
+    def _run_batch(self, name, messages):
+        handler = self.handler(name)
+        method = getattr(handler, "handle_batch", handler.handle)
+        if inspect.iscoroutinefunction(method):
+            raise TypeError(f"Handler '{name}' is async, use mode='asyncio'")
+
+        start = time.perf_counter()
+        if hasattr(handler, "handle_batch"):
+            results = self._check(name, messages, handler.handle_batch(messages))
+        else:
+            handle = handler.handle
+            results = [handle(message) for message in messages]
+        self._record(name, len(messages), time.perf_counter() - start)
+        return results
+
+    @staticmethod
+    def _check(name, messages, results):
+        # Результаты сопоставляются сообщениям по позиции: при другой длине
+        # они молча достались бы не тем сообщениям
+        results = list(results)
+        if len(results) != len(messages):
+            raise ValueError(
+                f"Handler '{name}' returned {len(results)} results "
+                f"for {len(messages)} messages"
+            )
+        return results
+
+    async def _run_batch_async(self, name, messages, executor):
+        # Корутины обработчика ждём прямо в цикле событий,
+        # синхронные обработчики уходят в пул, чтобы не блокировать его
+        # Тип метода смотрим по классу: экземпляр в потоке цикла событий
+        # нужен только асинхронным обработчикам
+        cls = Handler.get_by_name(name)
+        batch_method = getattr(cls, "handle_batch", None)
+        if batch_method is not None and inspect.iscoroutinefunction(batch_method):
+            start = time.perf_counter()
+            batch = self.handler(name).handle_batch(messages)
+            results = self._check(name, messages, await batch)
+        elif batch_method is None and inspect.iscoroutinefunction(cls.handle):
+            start = time.perf_counter()
+            results = await asyncio.gather(*map(self.handler(name).handle, messages))
+        else:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, self._run_batch, name, messages)
+        self._record(name, len(messages), time.perf_counter() - start)
+        return results
+
+    def _group(self, pairs):
+        # имя -> сообщения в порядке входа; каждая группа режется на пачки
+        groups = {}
+        for name, message in pairs:
+            group = groups.get(name)
+            if group is None:
+                group = groups[name] = []
+            group.append(message)
+
+        size = self.batch_size
+        return [
+            (name, messages[start : start + size])
+            for name, messages in groups.items()
+            for start in range(0, len(messages), size)
+        ]
+
+    @staticmethod
+    def _collect(pairs, tasks, batches):
+        # Пачки одного обработчика идут подряд и в порядке входа, так что
+        # результаты раздаются обратно простым проходом по входным парам
+        results = {}
+        for (name, _), batch in zip(tasks, batches):
+            results.setdefault(name, []).extend(batch)
+        take = {name: iter(values).__next__ for name, values in results.items()}
+        return [take[name]() for name, _ in pairs]
+
+    def dispatch(self, pairs):
+        # Результаты возвращаются в порядке входных пар
+        pairs = pairs if type(pairs) is list else list(pairs)
+        if self.mode == "asyncio":
+            return asyncio.run(self.dispatch_async(pairs))
+
+        tasks = self._group(pairs)
+        if self.mode == "threads":
+            batches = list(self.executor().map(self._run_batch, *zip(*tasks)))
+        else:
+            batches = [self._run_batch(name, messages) for name, messages in tasks]
+        return self._collect(pairs, tasks, batches)
+
+    async def dispatch_async(self, pairs):
+        pairs = pairs if type(pairs) is list else list(pairs)
+        tasks = self._group(pairs)
+        executor = self.executor()
+        batches = await asyncio.gather(
+            *(
+                self._run_batch_async(name, messages, executor)
+                for name, messages in tasks
+            )
+        )
+        return self._collect(pairs, tasks, batches)
+
+    def dispatch_stream(self, pairs, chunk_size=100_000):
+        # Поток пар читается кусками по chunk_size: в памяти не больше
+        # одного куска, результаты отдаются в порядке входа
+        for chunk in batched(pairs, chunk_size):
+            yield from self.dispatch(list(chunk))
+
+    def stats(self):
+        with self._lock:
+            counters = {name: list(values) for name, values in self._counters.items()}
+
+        return {
+            name: HandlerStats(
+                messages,
+                batches,
+                seconds,
+                messages / seconds if seconds else 0.0,
+                seconds / messages if messages else 0.0,
+                max_batch,
+            )
+            for name, (messages, batches, seconds, max_batch) in counters.items()
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self._counters.clear()
+
+
+def naive_dispatch(pairs):
+    return [Handler.get_by_name(name)().handle(message) for name, message in pairs]
+
+
+if __name__ == "__main__":
+    # audit лениво подгружается из манифеста и открывает соединение с SQLite
+    # в конструкторе: на нём видно, сколько стоит экземпляр на сообщение
+    RegistryMeta.load_manifest(
+        Path(__file__).with_name("additional_task_registry_manifest.json")
+    )
+    random.seed(0)
+    pairs = [
+        (random.choice(("email", "sms", "audit")), f"notification {i}")
+        for i in range(100_000)
+    ]
+
+    start = time.perf_counter()
+    expected = naive_dispatch(pairs)
+    naive = time.perf_counter() - start
+    print(f"{'Способ':<28} {'Время (сек)':<12} {'Ускорение':<10}")
+    print("-" * 50)
+    print(f"{'get_by_name(name)().handle':<28} {naive:<12.3f} {1.0:<10.2f}x")
+
+    for mode in MODES:
+        with Dispatcher(mode) as dispatcher:
+            start = time.perf_counter()
+            results = dispatcher.dispatch(pairs)
+            elapsed = time.perf_counter() - start
+        assert results == expected
+        print(f"{'Dispatcher ' + mode:<28} {elapsed:<12.3f} {naive / elapsed:<10.2f}x")
+
+    print(
+        f"\n{'Обработчик':<12} {'Сообщений':<12} {'Пачек':<8} {'сообщ/с':<14} мкс/сообщ"
+    )
+    print("-" * 60)
+    for name, stats in dispatcher.stats().items():
+        print(
+            f"{name:<12} {stats.messages:<12} {stats.batches:<8} "
+            f"{stats.throughput:<14,.0f} {stats.mean_latency * 1e6:.2f}"
+        )
+
+    class CountingHandler(Handler):
+        name = "counting"
+        created = 0
+
+        def __init__(self):
+            CountingHandler.created += 1
+
+        def handle(self, message):
+            return message
+
+    class ShortBatchHandler(Handler):
+        name = "short"
+
+        def handle(self, message):
+            return message
+
+        def handle_batch(self, messages):
+            return messages[1:]
+
+    stream = (("counting", i) for i in range(10_000))
+    for mode in MODES:
+        CountingHandler.created = 0
+        with Dispatcher(mode, batch_size=100, max_workers=1) as dispatcher:
+            streamed = list(dispatcher.dispatch_stream(stream, chunk_size=1000))
+            try:
+                dispatcher.dispatch([("short", 1), ("short", 2)])
+            except ValueError as e:
+                print(e)
+            else:
+                raise AssertionError("short handle_batch result must be rejected")
+        assert CountingHandler.created == 1, (mode, CountingHandler.created)
+        stream = (("counting", i) for i in range(10_000))
+    assert streamed == list(range(10_000))
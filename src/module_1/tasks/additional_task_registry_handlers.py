@@ -0,0 +1,36 @@
+import json
+import sqlite3
+import urllib.request
+
+from additional_task_registry_meta import Handler
+
+# Обработчики с тяжёлыми зависимостями: регистрируются лениво через
+# additional_task_registry_manifest.json, модуль импортируется только
+# при первом Handler.get_by_name("webhook") или ("audit")
+
+
+class WebhookHandler(Handler):
+    name = "webhook"
+
+    def __init__(self, url="http://localhost:8080/hooks"):
+        self.url = url
+
+    def handle(self, message):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"message": message}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        return f"Webhook: {request.full_url} {message}"
+
+
+class AuditHandler(Handler):
+    name = "audit"
+
+    def __init__(self, path=":memory:"):
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS audit (message TEXT)")
+
+    def handle(self, message):
+        self.db.execute("INSERT INTO audit VALUES (?)", (message,))
+        return f"Audit: {message}"
@@ -1,5 +1,19 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from importlib.metadata import entry_points
+
+
 class RegistryMeta(type):
     registry = {}
+    # Отложенная регистрация: имя обработчика -> "module:Class". Модуль
+    # импортируется при первом get_by_name, класс при этом регистрируется
+    # обычным путём через __new__
+    lazy = {}
+    import_times = {}
 
     def __new__(meta, name, bases, attrs):
         if name != "Handler":
@@ -11,13 +25,107 @@ class RegistryMeta(type):
 
             if attrs["name"] in meta.registry:
                 raise ValueError("Class with this name already exists (duplicate name)")
+
+            target = meta.lazy.get(attrs["name"])
+            qualname = attrs.get("__qualname__", name)
+            if target is not None and target != f"{attrs['__module__']}:{qualname}":
+                raise ValueError(
+                    f"Class with this name is already declared as {target} "
+                    + "(duplicate name)"
+                )
             cls = super().__new__(meta, name, bases, attrs)
             meta.registry[attrs["name"]] = cls
             return cls
 
-        attrs["get_by_name"] = lambda name: meta.registry[name]
+        attrs["get_by_name"] = staticmethod(meta.get_by_name)
         return super().__new__(meta, name, bases, attrs)
 
+    @classmethod
+    def get_by_name(meta, name):
+        if name in meta.registry:
+            return meta.registry[name]
+        if name not in meta.lazy:
+            raise KeyError(name)
+
+        module_name, _, class_name = meta.lazy[name].partition(":")
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        meta.import_times[name] = time.perf_counter() - start
+
+        cls = meta.registry.get(name)
+        if cls is None or cls is not getattr(module, class_name, None):
+            raise ImportError(f"{meta.lazy[name]} did not register handler '{name}'")
+        return cls
+
+    @classmethod
+    def register_lazy(meta, name, target):
+        if not name:
+            raise ValueError("Class name is empty")
+
+        module_name, _, class_name = target.partition(":")
+        if not module_name or not class_name:
+            raise ValueError(f"Target must look like 'module:Class', got '{target}'")
+
+        # Модуль с этим обработчиком могли импортировать раньше манифеста:
+        # запись, указывающая ровно на уже зарегистрированный класс, не дубль
+        registered = meta.registry.get(name)
+        if (
+            registered is not None
+            and f"{registered.__module__}:{registered.__qualname__}" != target
+        ) or meta.lazy.get(name, target) != target:
+            raise ValueError("Class with this name already exists (duplicate name)")
+        meta.lazy[name] = target
+
+    @classmethod
+    def load_manifest(meta, path):
+        # Манифест — JSON-объект {"имя": "module:Class"}
+        with open(path) as f:
+            for name, target in json.load(f).items():
+                meta.register_lazy(name, target)
+
+    @classmethod
+    def load_entry_points(meta, group="handlers"):
+        # Установленные пакеты объявляют обработчики в [project.entry-points]
+        for entry_point in entry_points(group=group):
+            meta.register_lazy(entry_point.name, entry_point.value)
+
+    @classmethod
+    def import_report(meta, measure_skipped=False):
+        # Что было импортировано по требованию и сколько это стоило.
+        # measure_skipped=True замеряет холодный импорт ещё не загруженных
+        # модулей в отдельных интерпретаторах: это и есть сэкономленное
+        # при старте время
+        rows = []
+        for name, target in sorted(meta.lazy.items()):
+            if name in meta.import_times:
+                rows.append((name, target, "imported", meta.import_times[name]))
+            elif name in meta.registry:
+                rows.append((name, target, "imported with another handler", 0.0))
+            elif measure_skipped:
+                rows.append((name, target, "skipped", meta.measure_import(target)))
+            else:
+                rows.append((name, target, "skipped", None))
+        return rows
+
+    @classmethod
+    def measure_import(meta, target):
+        # Сам модуль реестра уже загружен при старте, его в замер не включаем
+        module_name = target.split(":")[0]
+        preload = f"import {meta.__module__}; " if meta.__module__ != "__main__" else ""
+        code = (
+            f"{preload}import time; start = time.perf_counter(); "
+            + f"import {module_name}; print(time.perf_counter() - start)"
+        )
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))}
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        )
+        return float(result.stdout)
+
 
 class Handler(metaclass=RegistryMeta):
     pass
@@ -36,31 +144,43 @@ class SMSHandler(Handler):
     def handle(self, message):
         return f"SMS: {message}"
 
+    def handle_batch(self, messages):
+        return [f"SMS: {message}" for message in messages]
+
 
-handler = Handler.get_by_name("email")()
-print(handler.handle("Hello"))
+if __name__ == "__main__":
+    handler = Handler.get_by_name("email")()
+    print(handler.handle("Hello"))
 
-try:
+    # Манифест может повторять уже импортированный обработчик
+    RegistryMeta.register_lazy("email", f"{__name__}:EmailHandler")
+    assert Handler.get_by_name("email") is EmailHandler
+    RegistryMeta.register_lazy("broken", "json:JSONDecoder:extra")
+    try:
+        Handler.get_by_name("broken")
+    except ImportError as e:
+        print(e)
 
-    class DuplicateHandler(Handler):
-        name = "email"
+    try:
 
-except Exception as e:
-    print(e)
+        class DuplicateHandler(Handler):
+            name = "email"
 
+    except Exception as e:
+        print(e)
 
-try:
+    try:
 
-    class EmptyNameHandler(Handler):
-        name = ""
+        class EmptyNameHandler(Handler):
+            name = ""
 
-except Exception as e:
-    print(e)
+    except Exception as e:
+        print(e)
 
-try:
+    try:
 
-    class NoNameHandler(Handler):
-        pass
+        class NoNameHandler(Handler):
+            pass
 
-except Exception as e:
-    print(e)
+    except Exception as e:
+        print(e)
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from additional_task_registry_meta import Handler, RegistryMeta
+
+MANIFEST = Path(__file__).with_name("additional_task_registry_manifest.json")
+
+
+def cold_start(code, repeat=5):
+    # Каждый замер — новый интерпретатор, иначе модули уже в sys.modules
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"import time; start = time.perf_counter(); {code}; "
+                "print(time.perf_counter() - start)",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+        timings.append(float(result.stdout))
+    return min(timings)
+
+
+def startup_benchmark():
+    eager = cold_start(
+        "import additional_task_registry_meta, additional_task_registry_handlers"
+    )
+    lazy = cold_start(
+        "import additional_task_registry_meta as r; "
+        f"r.RegistryMeta.load_manifest({str(MANIFEST)!r})"
+    )
+    print(f"{'Старт':<24} {'мс':<10}")
+    print("-" * 34)
+    print(f"{'все модули сразу':<24} {eager * 1000:<10.1f}")
+    print(f"{'манифест':<24} {lazy * 1000:<10.1f}")
+
+
+def print_report():
+    print(f"\n{'Обработчик':<12} {'Статус':<32} {'Импорт, мс':<10}")
+    print("-" * 56)
+    for name, _, status, seconds in RegistryMeta.import_report(measure_skipped=True):
+        print(f"{name:<12} {status:<32} {seconds * 1000:<10.1f}")
+
+
+if __name__ == "__main__":
+    startup_benchmark()
+
+    RegistryMeta.load_manifest(MANIFEST)
+    print(Handler.get_by_name("email")().handle("Hello"))
+    print_report()
+
+    print(Handler.get_by_name("webhook")().handle("Hello"))
+    print_report()
@@ -1,5 +1,8 @@
+import struct
 from typing import get_origin
 
+import orjson
+
 
 class SerializerCreationError(Exception):
     def __str__(self):
@@ -62,9 +65,78 @@ class SerializerMissingRequiredField(Exception):
         )
 
 
+class SerializerBinaryRangeError(Exception):
+    def __init__(self, attr_name, target_type, provided_value):
+        self.attr_name = attr_name
+        self.target_type = target_type
+        self.provided_value = provided_value
+
+    def __str__(self):
+        return (
+            f"Field ({self.attr_name}: <{self.target_type.__name__}>) value "
+            + f"{self.provided_value} does not fit the binary format "
+            + f"('{BINARY_CODES[self.target_type]}')"
+        )
+
+
+class SerializerBatchError(Exception):
+    def __init__(self, errors):
+        # errors — список пар (индекс записи, исключение), по возрастанию индекса
+        self.errors = errors
+
+    def __str__(self):
+        shown = "; ".join(f"#{index}: {error}" for index, error in self.errors[:10])
+        hidden = len(self.errors) - 10
+        more = f"; ... and {hidden} more" if hidden > 0 else ""
+        return f"{len(self.errors)} invalid record field(s): {shown}{more}"
+
+
+# Двоичная запись: сначала заголовок struct со всеми полями
+# фиксированной ширины и длинами строк в байтах, затем по порядку
+# аннотаций байты строк в UTF-8 и вложенные записи целиком.
+# int пишется как int64: значения вне [-2**63, 2**63 - 1] в двоичный
+# формат не попадают (SerializerBinaryRangeError), строки — до 4 ГиБ
+BINARY_CODES = {bool: "?", int: "q", float: "d", str: "I"}
+
+
+class LazyNestedField:
+    # Дескриптор вложенного поля в ленивом режиме: в экземпляре под именем
+    # storage лежит либо сырой словарь, либо уже загруженный объект.
+    # Словарь разбирается и проверяется при первом чтении поля, результат
+    # кладётся на его место.
+    def __init__(self, name, serializer):
+        self.name = name
+        self.serializer = serializer
+        self.storage = "_lazy_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        value = getattr(obj, self.storage)
+        if type(value) is dict:
+            value = self.serializer.deserialize(value, log_path=type(obj).__name__)
+            setattr(obj, self.storage, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self.storage, value)
+
+
 class SerializerMeta(type):
-    def __new__(mcs, name, bases, attrs):
+    # codegen=False оставляет общие методы-замыкания вместо сгенерированных
+    # под класс: пригодится для отладки и для сравнения в бенчмарке.
+    # slots=False оставляет экземплярам __dict__ (например, чтобы вешать
+    # на них посторонние атрибуты), по умолчанию поля лежат в __slots__.
+    # lazy=True откладывает разбор вложенных сериализаторов до первого
+    # обращения к полю (см. LazyNestedField).
+    # track=True запоминает поля, изменённые после создания экземпляра
+    # (см. serialize_changes и apply_changes).
+    def __new__(
+        mcs, name, bases, attrs, codegen=True, slots=True, lazy=False, track=False
+    ):
         if name == "BaseSerializer":
+            attrs.setdefault("__slots__", ())
             return type.__new__(mcs, name, bases, attrs)
 
         if "__annotations__" not in attrs:
@@ -93,13 +165,136 @@ class SerializerMeta(type):
                     else:
                         init_values[attr] = attrs[attr]
 
-        attrs["__init__"] = SerializerMeta.create_init_method()
-        attrs["serialize"] = SerializerMeta.create_serialize_method()
-        attrs["deserialize"] = SerializerMeta.create_deserialize_method()
+        if slots and "__slots__" not in attrs:
+            # Значения-заглушки живут только в _init_values: атрибут класса
+            # с тем же именем, что и слот, type.__new__ не пропустит
+            for attr in init_values:
+                del attrs[attr]
+            attrs["__slots__"] = tuple(annotations)
+
+        lazy_fields = frozenset(
+            field
+            for field in annotations
+            if lazy and type(annotations[field]) is SerializerMeta
+        )
+        if lazy_fields:
+            # Слот поля занимает дескриптор, значение переезжает в _lazy_<поле>
+            if "__slots__" in attrs:
+                attrs["__slots__"] = tuple(
+                    "_lazy_" + field if field in lazy_fields else field
+                    for field in attrs["__slots__"]
+                )
+            for field in lazy_fields:
+                attrs[field] = LazyNestedField(field, annotations[field])
+
+        if codegen:
+            attrs["__init__"] = SerializerMeta.generate_init_method(
+                name, annotations, init_values, lazy_fields
+            )
+            attrs["serialize"] = SerializerMeta.generate_serialize_method(
+                name, annotations, lazy_fields
+            )
+            attrs["deserialize"] = SerializerMeta.generate_deserialize_method(
+                name, annotations, lazy_fields
+            )
+            attrs["_load"] = SerializerMeta.generate_deserialize_method(
+                name, annotations, lazy_fields, copy=False
+            )
+            attrs["construct"] = SerializerMeta.generate_construct_method(
+                name, annotations, init_values, lazy_fields
+            )
+            attrs["_trusted"] = SerializerMeta.generate_construct_method(
+                name, annotations, init_values, lazy_fields, keywords=False
+            )
+            attrs["_from_values"] = SerializerMeta.generate_from_values_method(
+                name, annotations
+            )
+        else:
+            attrs["__init__"] = SerializerMeta.create_init_method()
+            attrs["serialize"] = SerializerMeta.create_serialize_method()
+            attrs["deserialize"] = SerializerMeta.create_deserialize_method()
+            attrs["_load"] = SerializerMeta.create_deserialize_method(copy=False)
+            attrs["construct"] = SerializerMeta.create_construct_method()
+            attrs["_trusted"] = SerializerMeta.create_construct_method(keywords=False)
+            attrs["_from_values"] = SerializerMeta.create_from_values_method()
+        attrs["deserialize_many"] = SerializerMeta.create_deserialize_many_method()
+        attrs["serialize_many"] = SerializerMeta.create_serialize_many_method()
         attrs["_init_values"] = init_values
+        attrs["_lazy_fields"] = lazy_fields
+        attrs["_schema"] = tuple(
+            (field, annotations[field], init_values.get(field)) for field in annotations
+        )
+        attrs["_struct"] = SerializerMeta.build_struct(annotations)
+        if attrs["_struct"] is not None and codegen:
+            attrs["_encode"] = SerializerMeta.generate_encode_method(name, annotations)
+            attrs["_decode"] = SerializerMeta.generate_decode_method(name, annotations)
+        elif attrs["_struct"] is not None:
+            attrs["_encode"] = SerializerMeta.create_encode_method()
+            attrs["_decode"] = SerializerMeta.create_decode_method()
+
+        attrs["_track"] = track
+        if track:
+            SerializerMeta.install_tracking(attrs, annotations)
 
         return type.__new__(mcs, name, bases, attrs)
 
+    @staticmethod
+    def install_tracking(attrs, annotations):
+        # Изменённые поля копятся в множестве _changed. Пока объект строится,
+        # _changed ещё нет и присваивания не учитываются; каждый способ
+        # создания экземпляра в конце заводит пустое множество
+        fields = frozenset(annotations)
+        attrs["_tracked_nested"] = tuple(
+            field
+            for field in annotations
+            if type(annotations[field]) is SerializerMeta and annotations[field]._track
+        )
+        if "__slots__" in attrs:
+            attrs["__slots__"] = (*attrs["__slots__"], "_changed")
+
+        def __setattr__(self, name, value):
+            object.__setattr__(self, name, value)
+            if name in fields:
+                changed = getattr(self, "_changed", None)
+                if changed is not None:
+                    changed.add(name)
+
+        init = attrs["__init__"]
+
+        def __init__(self, *args, **kwargs):
+            init(self, *args, **kwargs)
+            self._changed = set()
+
+        def clean(method):
+            method = method.__func__
+
+            @classmethod
+            def wrapper(cls, /, *args, **kwargs):
+                obj = method(cls, *args, **kwargs)
+                self = obj[0] if type(obj) is tuple else obj
+                self._changed = set()
+                return obj
+
+            return wrapper
+
+        attrs["__setattr__"] = __setattr__
+        attrs["__init__"] = __init__
+        for method_name in ("construct", "_trusted", "_from_values", "_decode"):
+            if method_name in attrs:
+                attrs[method_name] = clean(attrs[method_name])
+
+    @staticmethod
+    def build_struct(annotations):
+        # None — у класса есть поля без двоичного представления
+        fields = [
+            annotations[field]
+            for field in annotations
+            if type(annotations[field]) is not SerializerMeta
+        ]
+        if not all(target in BINARY_CODES for target in fields):
+            return None
+        return struct.Struct("<" + "".join(BINARY_CODES[target] for target in fields))
+
     @staticmethod
     def validate_annotations(annotations):
         heterogeneous_collections = {list, tuple, dict, set, frozenset}
@@ -111,6 +306,460 @@ class SerializerMeta(type):
             ):
                 raise SerializerHeterogeneousCollectionsError(attr, annotations[attr])
 
+    @staticmethod
+    def compile_method(class_name, method_name, lines, namespace):
+        # Исходник метода собирается построчно и компилируется один раз при
+        # создании класса; namespace — глобальные имена для этого кода
+        source = "\n".join(lines)
+        code = compile(source, f"<serializer {class_name}.{method_name}>", "exec")
+        exec(code, namespace)
+        method = namespace[method_name]
+        method.__qualname__ = f"{class_name}.{method_name}"
+        return method
+
+    @staticmethod
+    def generate_init_method(class_name, annotations, init_values, lazy_fields):
+        # То же, что create_init_method, но развёрнутое по полям: значения
+        # по умолчанию и типы подставлены как глобальные имена, проверка
+        # типа — одно сравнение, присваивание — прямое self.field = value
+        namespace = {
+            "MissingField": SerializerMissingRequiredField,
+            "MismatchTypes": SerializerAnnotationMismatchTypesError,
+        }
+        lines = [
+            "def __init__(self, *args, **kwargs):",
+            "    log_path = None",
+            "    if args and not kwargs:",
+            "        kwargs = args[0]",
+            "        if len(args) > 1:",
+            "            log_path = args[1]",
+            "    get = kwargs.get",
+        ]
+
+        for i, field in enumerate(annotations):
+            namespace[f"type_{i}"] = annotations[field]
+            if init_values.get(field) is None:
+                lines.append(f"    value = get({field!r})")
+            else:
+                namespace[f"default_{i}"] = init_values[field]
+                lines.append(f"    value = get({field!r}, default_{i})")
+
+            lines += [
+                "    if value is None:",
+                f"        raise MissingField({field!r}, log_path, "
+                + "self.__class__.__name__)",
+            ]
+
+            if annotations[field] is float:
+                lines.append(
+                    f"    if type(value) is not type_{i} and type(value) is not int:"
+                )
+            elif field in lazy_fields:
+                # Сырой словарь проверит LazyNestedField при первом чтении
+                lines.append(
+                    f"    if type(value) is not type_{i} and type(value) is not dict:"
+                )
+            else:
+                lines.append(f"    if type(value) is not type_{i}:")
+
+            lines += [
+                f"        raise MismatchTypes({field!r}, 'provided', type_{i}, value)",
+                f"    self.{field} = value",
+            ]
+
+        return SerializerMeta.compile_method(class_name, "__init__", lines, namespace)
+
+    @staticmethod
+    def generate_serialize_method(class_name, annotations, lazy_fields):
+        items = []
+        for field in annotations:
+            if field in lazy_fields:
+                # Нетронутый сырой словарь уходит как есть
+                items.append(
+                    f"        {field!r}: self._lazy_{field} "
+                    f"if type(self._lazy_{field}) is dict "
+                    f"else self._lazy_{field}.serialize(),"
+                )
+            elif type(annotations[field]) is SerializerMeta:
+                items.append(f"        {field!r}: self.{field}.serialize(),")
+            else:
+                items.append(f"        {field!r}: self.{field},")
+
+        lines = ["def serialize(self):", "    return {", *items, "    }"]
+        return SerializerMeta.compile_method(class_name, "serialize", lines, {})
+
+    @staticmethod
+    def generate_deserialize_method(class_name, annotations, lazy_fields, copy=True):
+        # copy=False даёт _load: тот же разбор, но словарь правится на месте
+        # и вложенные словари грузятся тоже через _load — для данных, которые
+        # только что разобраны из JSON и больше никому не принадлежат
+        method_name, nested_method = (
+            ("deserialize", "deserialize") if copy else ("_load", "_load")
+        )
+        namespace = {}
+        lines = [
+            f"def {method_name}(cls, attrs, *, log_path=None, validate=True):",
+            "    if not validate:",
+            "        return cls._trusted(attrs)",
+        ]
+        if copy:
+            lines.append("    attrs = {**attrs}")
+
+        nested = [
+            field
+            for field in annotations
+            if type(annotations[field]) is SerializerMeta and field not in lazy_fields
+        ]
+        if nested:
+            lines.append(
+                "    nested_path = log_path + ': ' + cls.__name__ "
+                + "if log_path else cls.__name__"
+            )
+        for i, field in enumerate(nested):
+            namespace[f"nested_{i}"] = annotations[field]
+            lines += [
+                f"    if {field!r} in attrs:",
+                f"        attrs[{field!r}] = nested_{i}.{nested_method}(",
+                f"            attrs[{field!r}], log_path=nested_path",
+                "        )",
+            ]
+
+        lines.append("    return cls(attrs, log_path)")
+        method = SerializerMeta.compile_method(
+            class_name, method_name, lines, namespace
+        )
+        return classmethod(method)
+
+    @staticmethod
+    def generate_construct_method(
+        class_name, annotations, init_values, lazy_fields, keywords=True
+    ):
+        # Доверенный путь для данных, которые мы сами же и произвели: поля и
+        # значения по умолчанию присваиваются напрямую, без проверок типов.
+        # keywords=True даёт construct(**fields), иначе _trusted(attrs) для
+        # deserialize(..., validate=False); вложенные словари идут в _trusted
+        method_name = "construct" if keywords else "_trusted"
+        # Встроенные type и dict — под псевдонимами: поле type или dict
+        # стало бы параметром и перекрыло бы их
+        namespace = {"_new_instance": object.__new__, "_type": type, "_dict": dict}
+        params, body = [], []
+        # Поле с именем параметра, локальной или глобальной переменной
+        # сгенерированного кода не может быть именованным параметром:
+        # тогда construct(cls, /, **fields) и значения берутся из словаря
+        internal = {"cls", "self", "fields", "attrs", *namespace}
+        for i in range(len(annotations)):
+            internal |= {f"default_{i}", f"nested_{i}", f"child_{i}"}
+        as_params = keywords and internal.isdisjoint(annotations)
+
+        for i, field in enumerate(annotations):
+            default = "None"
+            if init_values.get(field) is not None:
+                namespace[f"default_{i}"] = init_values[field]
+                default = f"default_{i}"
+
+            # construct принимает поля как обычные именованные параметры:
+            # при вызове не строится словарь **kwargs
+            if as_params:
+                params.append(f"{field}={default}")
+                value = field
+            elif keywords:
+                value = f"fields.get({field!r}, {default})"
+            else:
+                value = f"attrs.get({field!r}, {default})"
+
+            if type(annotations[field]) is SerializerMeta and field not in lazy_fields:
+                namespace[f"nested_{i}"] = annotations[field]
+                body += [
+                    f"    child_{i} = {value}",
+                    f"    self.{field} = nested_{i}._trusted(child_{i}) "
+                    f"if _type(child_{i}) is _dict else child_{i}",
+                ]
+            else:
+                body.append(f"    self.{field} = {value}")
+
+        if as_params:
+            signature = f"cls, /, *, {', '.join(params)}"
+        elif keywords:
+            signature = "cls, /, **fields"
+        else:
+            signature = "cls, attrs"
+        lines = [f"def {method_name}({signature}):"]
+        if keywords and not as_params:
+            namespace["_fields"] = frozenset(annotations)
+            lines += [
+                "    unknown = fields.keys() - _fields",
+                "    if unknown:",
+                "        raise TypeError(",
+                f"            f'{method_name}() got unexpected keyword arguments "
+                + "{sorted(unknown)}'",
+                "        )",
+            ]
+        lines += ["    self = _new_instance(cls)", *body]
+        lines.append("    return self")
+        method = SerializerMeta.compile_method(
+            class_name, method_name, lines, namespace
+        )
+        return classmethod(method)
+
+    @staticmethod
+    def generate_from_values_method(class_name, annotations):
+        # Экземпляр из уже проверенных значений полей, в порядке аннотаций,
+        # без вызова __init__. Параметры позиционные value_<i>: имя поля
+        # (cls, self, ...) не должно попадать в код как имя переменной
+        params = ", ".join(f"value_{i}" for i in range(len(annotations)))
+        lines = [
+            f"def _from_values(cls, {params}):",
+            "    self = _new_instance(cls)",
+            *(f"    self.{field} = value_{i}" for i, field in enumerate(annotations)),
+            "    return self",
+        ]
+        method = SerializerMeta.compile_method(
+            class_name, "_from_values", lines, {"_new_instance": object.__new__}
+        )
+        return classmethod(method)
+
+    @staticmethod
+    def generate_encode_method(class_name, annotations):
+        # Дописывает запись в bytearray out
+        header, tail, lines = [], [], ["def _encode(self, out):"]
+        for i, field in enumerate(annotations):
+            if annotations[field] is str:
+                lines.append(f"    data_{i} = self.{field}.encode()")
+                header.append(f"len(data_{i})")
+                tail.append(f"    out += data_{i}")
+            elif type(annotations[field]) is SerializerMeta:
+                tail.append(f"    self.{field}._encode(out)")
+            else:
+                header.append(f"self.{field}")
+
+        if header:
+            lines += [
+                "    try:",
+                f"        out += self._struct.pack({', '.join(header)})",
+                "    except (StructError, OverflowError) as error:",
+                "        raise binary_error(self) from error",
+            ]
+        lines += tail or ["    pass"]
+        namespace = {
+            "StructError": struct.error,
+            "binary_error": SerializerMeta.binary_error,
+        }
+        return SerializerMeta.compile_method(class_name, "_encode", lines, namespace)
+
+    @staticmethod
+    def binary_error(obj):
+        # Какое поле не влезло в заголовок struct: ошибка должна его назвать
+        for field, target, _ in obj._schema:
+            if target in BINARY_CODES and target is not str:
+                value = getattr(obj, field)
+                try:
+                    struct.pack("<" + BINARY_CODES[target], value)
+                except (struct.error, OverflowError):
+                    return SerializerBinaryRangeError(field, target, value)
+        return TypeError(f"{type(obj).__name__}: fields do not match the binary format")
+
+    @staticmethod
+    def generate_decode_method(class_name, annotations):
+        # Читает запись из memoryview с позиции offset, возвращает объект и
+        # позицию сразу за ним. Строки декодируются прямо из среза view,
+        # без промежуточного bytes; типы полей гарантирует сам формат
+        namespace = {"_new_instance": object.__new__}
+        header = [
+            f"value_{i}"
+            for i, field in enumerate(annotations)
+            if type(annotations[field]) is not SerializerMeta
+        ]
+        lines = ["def _decode(cls, view, offset):"]
+        if header:
+            lines += [
+                f"    {', '.join(header)}, = cls._struct.unpack_from(view, offset)",
+                "    offset += cls._struct.size",
+            ]
+
+        for i, field in enumerate(annotations):
+            if annotations[field] is str:
+                lines += [
+                    f"    end = offset + value_{i}",
+                    f"    value_{i} = str(view[offset:end], 'utf-8')",
+                    "    offset = end",
+                ]
+            elif type(annotations[field]) is SerializerMeta:
+                namespace[f"nested_{i}"] = annotations[field]
+                lines.append(
+                    f"    value_{i}, offset = nested_{i}._decode(view, offset)"
+                )
+
+        lines += [
+            "    self = _new_instance(cls)",
+            *(f"    self.{field} = value_{i}" for i, field in enumerate(annotations)),
+            "    return self, offset",
+        ]
+        method = SerializerMeta.compile_method(class_name, "_decode", lines, namespace)
+        return classmethod(method)
+
+    @staticmethod
+    def create_deserialize_many_method():
+        # Пакетная загрузка: схема класса берётся один раз, каждое поле
+        # проверяется одним проходом по своему столбцу, вложенные сериализаторы
+        # загружаются тоже пакетом. Ошибки не прерывают проверку — в
+        # SerializerBatchError попадают все, с индексом записи.
+        @classmethod
+        def deserialize_many(cls, records, *, log_path=None, validate=True):
+            if not validate:
+                trusted = cls._trusted
+                return [trusted(record) for record in records]
+
+            records = records if type(records) is list else list(records)
+            nested_path = log_path + ": " + cls.__name__ if log_path else cls.__name__
+            columns = []
+            errors = []
+
+            for field, target, default in cls._schema:
+                column = [record.get(field, default) for record in records]
+                # Если пакет вложенных объектов не загрузился, их поля уже
+                # проверены и ошибки учтены — тип столбца не перепроверяем
+                skip = ()
+
+                if field in cls._lazy_fields:
+                    # Сырые словари останутся до первого обращения к полю
+                    allowed = {target, dict}
+                elif target is float:
+                    allowed = {float, int}
+                else:
+                    allowed = {target}
+
+                if type(target) is SerializerMeta and field not in cls._lazy_fields:
+                    present = [i for i, value in enumerate(column) if value is not None]
+                    try:
+                        children = target.deserialize_many(
+                            [column[i] for i in present], log_path=nested_path
+                        )
+                    except SerializerBatchError as e:
+                        skip = set(present)
+                        errors.extend((present[j], error) for j, error in e.errors)
+                    else:
+                        for i, child in zip(present, children):
+                            column[i] = child
+
+                # Проверка всего столбца за один проход на уровне C: набор
+                # встреченных типов; поэлементно — только если он неожиданный
+                if set(map(type, column)) <= allowed:
+                    columns.append(column)
+                    continue
+
+                for i, value in enumerate(column):
+                    if type(value) in allowed or i in skip:
+                        continue
+                    if value is None:
+                        error = SerializerMissingRequiredField(
+                            field, log_path, cls.__name__
+                        )
+                        errors.append((i, error))
+                    else:
+                        error = SerializerAnnotationMismatchTypesError(
+                            field, "provided", target, value
+                        )
+                        errors.append((i, error))
+                columns.append(column)
+
+            if errors:
+                errors.sort(key=lambda error: error[0])
+                raise SerializerBatchError(errors)
+
+            return list(map(cls._from_values, *columns))
+
+        return deserialize_many
+
+    @staticmethod
+    def create_serialize_many_method():
+        @classmethod
+        def serialize_many(cls, objs):
+            serialize = cls.serialize
+            return [serialize(obj) for obj in objs]
+
+        return serialize_many
+
+    @staticmethod
+    def create_construct_method(keywords=True):
+        @classmethod
+        def _trusted(cls, attrs):
+            self = object.__new__(cls)
+            for field, target, default in cls._schema:
+                value = attrs.get(field, default)
+                if (
+                    type(value) is dict
+                    and type(target) is SerializerMeta
+                    and field not in cls._lazy_fields
+                ):
+                    value = target._trusted(value)
+                setattr(self, field, value)
+            return self
+
+        @classmethod
+        def construct(cls, /, **attrs):
+            return cls._trusted(attrs)
+
+        return construct if keywords else _trusted
+
+    @staticmethod
+    def create_encode_method():
+        def _encode(self, out):
+            header, tail = [], []
+            for field, target, _ in self._schema:
+                value = getattr(self, field)
+                if target is str:
+                    value = value.encode()
+                    header.append(len(value))
+                    tail.append(value)
+                elif type(target) is SerializerMeta:
+                    tail.append(value)
+                else:
+                    header.append(value)
+
+            try:
+                out += self._struct.pack(*header)
+            except (struct.error, OverflowError) as error:
+                raise SerializerMeta.binary_error(self) from error
+            for value in tail:
+                if type(value) is bytes:
+                    out += value
+                else:
+                    value._encode(out)
+
+        return _encode
+
+    @staticmethod
+    def create_decode_method():
+        @classmethod
+        def _decode(cls, view, offset):
+            header = iter(cls._struct.unpack_from(view, offset))
+            offset += cls._struct.size
+            self = object.__new__(cls)
+            for field, target, _ in cls._schema:
+                if type(target) is SerializerMeta:
+                    value, offset = target._decode(view, offset)
+                else:
+                    value = next(header)
+                    if target is str:
+                        end = offset + value
+                        value = str(view[offset:end], "utf-8")
+                        offset = end
+                setattr(self, field, value)
+            return self, offset
+
+        return _decode
+
+    @staticmethod
+    def create_from_values_method():
+        @classmethod
+        def _from_values(cls, *values):
+            self = object.__new__(cls)
+            for field, value in zip(cls.__annotations__, values):
+                setattr(self, field, value)
+            return self
+
+        return _from_values
+
     @staticmethod
     def create_init_method():
         def init(self, *args, **kwargs):
@@ -130,8 +779,11 @@ class SerializerMeta(type):
 
                 if self.__class__.__annotations__[field] is not type(value):
                     if not (
-                        self.__class__.__annotations__[field] is float
-                        and type(value) is int
+                        (
+                            self.__class__.__annotations__[field] is float
+                            and type(value) is int
+                        )
+                        or (field in self._lazy_fields and type(value) is dict)
                     ):
                         raise SerializerAnnotationMismatchTypesError(
                             field,
@@ -151,9 +803,15 @@ class SerializerMeta(type):
             fields = self.__class__.__annotations__
 
             for attr in fields:
-                data[attr] = getattr(self, attr)
-
-                if type(fields[attr]) is SerializerMeta:
+                if attr in self._lazy_fields:
+                    data[attr] = getattr(self, "_lazy_" + attr)
+                else:
+                    data[attr] = getattr(self, attr)
+
+                if (
+                    type(data[attr]) is not dict
+                    and type(fields[attr]) is SerializerMeta
+                ):
                     data[attr] = data[attr].serialize()
 
             return data
@@ -161,14 +819,22 @@ class SerializerMeta(type):
         return serialize
 
     @staticmethod
-    def create_deserialize_method():
+    def create_deserialize_method(copy=True):
         @classmethod
-        def deserialize(cls, attrs, *, log_path=None):
-            attrs = {**attrs}
+        def deserialize(cls, attrs, *, log_path=None, validate=True):
+            if not validate:
+                return cls._trusted(attrs)
+            if copy:
+                attrs = {**attrs}
             for field in attrs:
                 if field in cls.__annotations__:
-                    if type(cls.__annotations__[field]) is SerializerMeta:
-                        attrs[field] = cls.__annotations__[field].deserialize(
+                    if (
+                        type(cls.__annotations__[field]) is SerializerMeta
+                        and field not in cls._lazy_fields
+                    ):
+                        nested = cls.__annotations__[field]
+                        load = nested.deserialize if copy else nested._load
+                        attrs[field] = load(
                             attrs[field],
                             log_path=(
                                 log_path + ": " + cls.__name__
@@ -185,4 +851,146 @@ class SerializerMeta(type):
 
 
 class BaseSerializer(metaclass=SerializerMeta):
-    pass
+    def to_json(self):
+        return orjson.dumps(self.serialize())
+
+    @classmethod
+    def from_json(cls, data):
+        # Словарь из orjson.loads принадлежит только нам — разбираем его без копий
+        return cls._load(orjson.loads(data))
+
+    @classmethod
+    def iter_jsonl(cls, file):
+        # Построчно: в памяти одновременно только одна запись,
+        # файл может быть открыт как в текстовом, так и в бинарном режиме
+        load, loads = cls._load, orjson.loads
+        for line in file:
+            if line.strip():
+                yield load(loads(line))
+
+    @classmethod
+    def write_jsonl(cls, file, objs):
+        # file открыт в бинарном режиме; writelines берёт строки по одной
+        # из генератора, так что список всех записей не собирается
+        dumps, option = orjson.dumps, orjson.OPT_APPEND_NEWLINE
+        file.writelines(dumps(obj.serialize(), option=option) for obj in objs)
+
+    def serialize_changes(self):
+        # Патч с полями, изменёнными с момента создания (или mark_clean):
+        # заменённое вложенное поле уходит целиком, изменённое внутри —
+        # своим патчем
+        if not self._track:
+            raise TypeError(f"{type(self).__name__} is not created with track=True")
+
+        annotations = type(self).__annotations__
+        patch = {}
+        for field in self._changed:
+            value = getattr(self, field)
+            if type(annotations[field]) is SerializerMeta:
+                value = value.serialize()
+            patch[field] = value
+        for field, child in self._tracked_children():
+            if field not in self._changed:
+                changes = child.serialize_changes()
+                if changes:
+                    patch[field] = changes
+        return patch
+
+    def apply_changes(self, patch, *, log_path=None):
+        # Весь патч, включая вложенные, проверяется до первого присваивания:
+        # при ошибке объект остаётся нетронутым
+        for target, values in self._plan_changes(patch, log_path):
+            for field, value in values:
+                setattr(target, field, value)
+
+    def _plan_changes(self, patch, log_path):
+        # Список (объект, [(поле, значение)]) для этого объекта и вложенных
+        annotations = type(self).__annotations__
+        class_name = type(self).__name__
+        nested_path = log_path + ": " + class_name if log_path else class_name
+        values, nested = [], []
+
+        for field, value in patch.items():
+            if field not in annotations:
+                raise SerializerAnnotationMissedError(field)
+            target = annotations[field]
+
+            if value is None:
+                raise SerializerMissingRequiredField(field, log_path, class_name)
+            elif type(target) is SerializerMeta and type(value) is dict:
+                nested.append((field, value))
+            elif type(value) is not target and not (
+                target is float and type(value) is int
+            ):
+                raise SerializerAnnotationMismatchTypesError(
+                    field, "provided", target, value
+                )
+            else:
+                values.append((field, value))
+
+        plan = [(self, values)]
+        for field, value in nested:
+            plan += getattr(self, field)._plan_changes(value, nested_path)
+        return plan
+
+    def mark_clean(self):
+        if not self._track:
+            raise TypeError(f"{type(self).__name__} is not created with track=True")
+
+        self._changed = set()
+        for _, child in self._tracked_children():
+            child.mark_clean()
+
+    def _tracked_children(self):
+        # Уже загруженные вложенные объекты с отслеживанием изменений:
+        # сырой словарь ленивого поля никто не менял
+        for field in self._tracked_nested:
+            if field in self._lazy_fields:
+                child = getattr(self, "_lazy_" + field)
+            else:
+                child = getattr(self, field)
+            if type(child) is not dict:
+                yield field, child
+
+    def _encode(self, out):
+        raise TypeError(f"{type(self).__name__} has fields without a binary layout")
+
+    @classmethod
+    def _decode(cls, view, offset):
+        raise TypeError(f"{cls.__name__} has fields without a binary layout")
+
+    def to_bytes(self):
+        out = bytearray()
+        self._encode(out)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        view = memoryview(data)
+        obj, offset = cls._decode(view, 0)
+        if offset != len(view):
+            raise ValueError(
+                f"{cls.__name__}: expected {offset} bytes, got {len(view)}"
+            )
+        return obj
+
+    @classmethod
+    def pack_many(cls, objs):
+        # Записи самоограничены, так что идут подряд без разделителей:
+        # такой буфер можно дописывать в конец очереди или файла
+        out = bytearray()
+        for obj in objs:
+            obj._encode(out)
+        return bytes(out)
+
+    @classmethod
+    def unpack_many(cls, data):
+        view = memoryview(data)
+        size, offset, objs = len(view), 0, []
+        decode, append = cls._decode, objs.append
+        while offset < size:
+            obj, offset = decode(view, offset)
+            append(obj)
+        if offset != size:
+            raise ValueError(f"{cls.__name__}: truncated record at the end of data")
+        return objs
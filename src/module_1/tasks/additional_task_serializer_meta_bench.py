@@ -0,0 +1,260 @@
+import timeit
+import tracemalloc
+
+import orjson
+from additional_task_serializer_meta import BaseSerializer, SerializerMeta
+
+
+def make_schema(codegen=True, slots=True):
+    class Address(BaseSerializer, codegen=codegen, slots=slots):
+        city: str
+        street: str
+        house: int
+        lat: float = 0
+        lon: float = 0
+
+    class Record(BaseSerializer, codegen=codegen, slots=slots):
+        id: int
+        name: str
+        email: str
+        age: int
+        score: float
+        active: bool = True
+        tag: str = "none"
+        visits: int = 0
+        balance: float = 0
+        address: Address
+
+    return Address, Record
+
+
+def throughput(func, number):
+    elapsed = min(timeit.repeat(func, number=number, repeat=3))
+    return number / elapsed
+
+
+def codegen_benchmark(number=50_000):
+    data = {
+        "id": 1,
+        "name": "Ivan",
+        "email": "ivan@example.com",
+        "age": 30,
+        "score": 4.5,
+        "address": {"city": "Moscow", "street": "Tverskaya", "house": 1},
+    }
+
+    rows = {}
+    for label, codegen in (("замыкания", False), ("codegen", True)):
+        Address, Record = make_schema(codegen)
+        address = Address(data["address"])
+        fields = {**data, "address": address}
+        record = Record(fields)
+
+        rows[label] = {
+            "construct": throughput(lambda: Record(fields), number),
+            "serialize": throughput(record.serialize, number),
+            "deserialize": throughput(lambda: Record.deserialize(data), number),
+        }
+
+    print(f"{'Операция':<14} {'замыкания (оп/с)':<18} {'codegen (оп/с)':<18} Ускорение")
+    print("-" * 62)
+    for op in rows["codegen"]:
+        before, after = rows["замыкания"][op], rows["codegen"][op]
+        print(f"{op:<14} {before:<18,.0f} {after:<18,.0f} {after / before:.2f}x")
+
+
+def batch_benchmark(count=10_000):
+    _, Record = make_schema()
+    data = [
+        {
+            "id": i,
+            "name": f"user{i}",
+            "email": f"user{i}@example.com",
+            "age": 20 + i % 50,
+            "score": i / 10,
+            "address": {"city": "Moscow", "street": "Tverskaya", "house": i},
+        }
+        for i in range(count)
+    ]
+    records = Record.deserialize_many(data)
+
+    cases = {
+        "deserialize": (
+            lambda: [Record.deserialize(item) for item in data],
+            lambda: Record.deserialize_many(data),
+        ),
+        "serialize": (
+            lambda: [record.serialize() for record in records],
+            lambda: Record.serialize_many(records),
+        ),
+    }
+
+    print(f"\n{count} записей")
+    print(f"{'Операция':<14} {'цикл (зап/с)':<18} {'пакет (зап/с)':<18} Ускорение")
+    print("-" * 62)
+    for op, (loop, batch) in cases.items():
+        before = throughput(loop, 5) * count
+        after = throughput(batch, 5) * count
+        print(f"{op:<14} {before:<18,.0f} {after:<18,.0f} {after / before:.2f}x")
+
+
+def lazy_benchmark(number=20_000, width=8):
+    # Широкий документ из width вложенных адресов: обычно из него читают
+    # только верхнеуровневое поле, последняя строка — цена ленивости,
+    # когда всё же трогают все вложенные объекты
+    rows = {}
+    for label, lazy in (("eager", False), ("lazy", True)):
+        Address, _ = make_schema()
+        attrs = {"id": int, **{f"address_{i}": Address for i in range(width)}}
+        Document = SerializerMeta(
+            "Document", (BaseSerializer,), {"__annotations__": attrs}, lazy=lazy
+        )
+        data = {
+            "id": 1,
+            **{
+                f"address_{i}": {"city": "Moscow", "street": "Tverskaya", "house": i}
+                for i in range(width)
+            },
+        }
+        names = [f"address_{i}" for i in range(width)]
+        rows[label] = {
+            "deserialize + id": throughput(
+                lambda: Document.deserialize(data).id, number
+            ),
+            "round trip": throughput(
+                lambda: Document.deserialize(data).serialize(), number
+            ),
+            "deserialize + all": throughput(
+                lambda: [
+                    getattr(document, name).house
+                    for document in [Document.deserialize(data)]
+                    for name in names
+                ],
+                number,
+            ),
+        }
+
+    print(f"\n{'Операция':<20} {'eager (оп/с)':<16} {'lazy (оп/с)':<16} Ускорение")
+    print("-" * 64)
+    for op in rows["lazy"]:
+        before, after = rows["eager"][op], rows["lazy"][op]
+        print(f"{op:<20} {before:<16,.0f} {after:<16,.0f} {after / before:.2f}x")
+
+
+def trusted_benchmark(number=50_000):
+    Address, Record = make_schema()
+    data = {
+        "id": 1,
+        "name": "Ivan",
+        "email": "ivan@example.com",
+        "age": 30,
+        "score": 4.5,
+        "address": {"city": "Moscow", "street": "Tverskaya", "house": 1},
+    }
+    fields = {**data, "address": Address(data["address"])}
+
+    cases = {
+        "construct": (lambda: Record(**fields), lambda: Record.construct(**fields)),
+        "deserialize": (
+            lambda: Record.deserialize(data),
+            lambda: Record.deserialize(data, validate=False),
+        ),
+    }
+
+    print(f"\n{'Операция':<14} {'с проверкой':<18} {'без проверки':<18} Ускорение")
+    print("-" * 62)
+    for op, (checked, trusted) in cases.items():
+        before, after = throughput(checked, number), throughput(trusted, number)
+        print(f"{op:<14} {before:<18,.0f} {after:<18,.0f} {after / before:.2f}x")
+
+
+def binary_benchmark(count=10_000):
+    # Упаковка пачки записей: JSONL через orjson против двоичного формата
+    _, Record = make_schema()
+    data = [
+        {
+            "id": i,
+            "name": f"user{i}",
+            "email": f"user{i}@example.com",
+            "age": 20 + i % 50,
+            "score": i / 10,
+            "address": {"city": "Moscow", "street": "Tverskaya", "house": i},
+        }
+        for i in range(count)
+    ]
+    records = Record.deserialize_many(data)
+
+    def dump_jsonl():
+        return b"\n".join(record.to_json() for record in records)
+
+    def load_jsonl(blob):
+        return [Record.from_json(line) for line in blob.split(b"\n")]
+
+    jsonl, binary = dump_jsonl(), Record.pack_many(records)
+    cases = {
+        "pack": (dump_jsonl, lambda: Record.pack_many(records)),
+        "unpack": (lambda: load_jsonl(jsonl), lambda: Record.unpack_many(binary)),
+    }
+
+    print(
+        f"\n{count} записей: JSONL {len(jsonl):,} байт, двоичный {len(binary):,} байт"
+    )
+    print(f"{'Операция':<14} {'JSONL (зап/с)':<18} {'bytes (зап/с)':<18} Ускорение")
+    print("-" * 62)
+    for op, (as_json, as_binary) in cases.items():
+        before = throughput(as_json, 5) * count
+        after = throughput(as_binary, 5) * count
+        print(f"{op:<14} {before:<18,.0f} {after:<18,.0f} {after / before:.2f}x")
+
+
+def changes_benchmark(number=50_000, width=100):
+    # Широкий объект, у которого между отправками меняется одно поле
+    attrs = {f"field_{i}": int for i in range(width)}
+    Wide = SerializerMeta(
+        "Wide", (BaseSerializer,), {"__annotations__": attrs}, track=True
+    )
+    wide = Wide.construct(**{field: 0 for field in attrs})
+    wide.field_0 = 1
+
+    full, patch = orjson.dumps(wide.serialize()), orjson.dumps(wide.serialize_changes())
+    before = throughput(wide.serialize, number)
+    after = throughput(wide.serialize_changes, number)
+
+    print(f"\n{width} полей, изменено одно: {len(full)} -> {len(patch)} байт")
+    print(f"{'serialize':<20} {before:,.0f} оп/с")
+    print(f"{'serialize_changes':<20} {after:,.0f} оп/с ({after / before:.2f}x)")
+
+
+def bytes_per_instance(cls, fields, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [cls(fields) for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Сам список objects — не часть экземпляров
+    allocated -= objects.__sizeof__()
+    return allocated / count
+
+
+def memory_benchmark(count=100_000):
+    # Значения полей общие для всех экземпляров, так что считается только
+    # стоимость самих объектов: __dict__ против слотов
+    fields = {"city": "Moscow", "street": "Tverskaya", "house": 1}
+
+    print(f"\n{'Раскладка':<12} {'байт/экземпляр':<16}")
+    print("-" * 28)
+    for label, slots in (("__dict__", False), ("__slots__", True)):
+        Address, _ = make_schema(slots=slots)
+        print(f"{label:<12} {bytes_per_instance(Address, fields, count):<16.1f}")
+
+
+if __name__ == "__main__":
+    codegen_benchmark()
+    batch_benchmark()
+    lazy_benchmark()
+    trusted_benchmark()
+    binary_benchmark()
+    changes_benchmark()
+    memory_benchmark()
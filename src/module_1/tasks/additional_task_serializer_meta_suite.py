@@ -0,0 +1,281 @@
+import argparse
+import dataclasses
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+from additional_task_serializer_meta import BaseSerializer, SerializerMeta
+
+# Регрессионный набор замеров для SerializerMeta. Каждый замер — одна
+# операция (создание класса, конструктор, serialize, deserialize, пакетные
+# методы) на одной схеме, для сериализатора и для двух ориентиров:
+# dataclass со слотами и обычного словаря. Результаты можно сохранить в JSON
+# и сравнить с прошлым прогоном: если сериализатор стал медленнее порога,
+# скрипт завершается с кодом 1.
+#
+#   python additional_task_serializer_meta_suite.py --json base.json
+#   python additional_task_serializer_meta_suite.py --baseline base.json
+
+PROFILES = {
+    "quick": {
+        "widths": (10, 50, 200),
+        "depths": (1, 3, 10),
+        "batches": (1, 100, 10_000),
+    },
+    "full": {
+        "widths": (10, 25, 50, 100, 200),
+        "depths": (1, 2, 5, 10),
+        "batches": (1, 100, 10_000, 100_000, 1_000_000),
+    },
+}
+
+FIELD_TYPES = (int, str, float, bool)
+SAMPLES = {int: 1, str: "value", float: 1.5, bool: True}
+
+
+def make_fields(width):
+    return {f"field_{i}": FIELD_TYPES[i % len(FIELD_TYPES)] for i in range(width)}
+
+
+def make_serializer(width, depth):
+    # depth=0 — плоская схема, иначе цепочка из depth вложенных уровней
+    child = None
+    for level in reversed(range(depth + 1)):
+        annotations = make_fields(width)
+        if child is not None:
+            annotations["child"] = child
+        child = SerializerMeta(
+            f"Level{level}", (BaseSerializer,), {"__annotations__": annotations}
+        )
+    return child
+
+
+def make_dataclass(width, depth):
+    child = None
+    for level in reversed(range(depth + 1)):
+        fields = list(make_fields(width).items())
+        if child is not None:
+            fields.append(("child", child))
+        child = dataclasses.make_dataclass(f"Level{level}", fields, slots=True)
+    return child
+
+
+def make_data(width, depth):
+    data = {field: SAMPLES[target] for field, target in make_fields(width).items()}
+    if depth:
+        data["child"] = make_data(width, depth - 1)
+    return data
+
+
+def dataclass_from_dict(cls, data):
+    # Ориентир без проверки типов: только сборка объектов
+    if "child" in data:
+        child_cls = cls.__dataclass_fields__["child"].type
+        data = {**data, "child": dataclass_from_dict(child_cls, data["child"])}
+    return cls(**data)
+
+
+def copy_tree(data):
+    return {
+        key: copy_tree(value) if type(value) is dict else value
+        for key, value in data.items()
+    }
+
+
+def implementations(width, depth):
+    # Для каждой реализации: создание класса и операции над одной записью
+    serializer = make_serializer(width, depth)
+    dataclass = make_dataclass(width, depth)
+    data = make_data(width, depth)
+
+    record = serializer.deserialize(data)
+    fields = {field: getattr(record, field) for field in serializer.__annotations__}
+    instance = dataclass_from_dict(dataclass, data)
+    dc_fields = {
+        field.name: getattr(instance, field.name)
+        for field in dataclasses.fields(instance)
+    }
+
+    return {
+        "serializer": {
+            "create_class": lambda: make_serializer(width, depth),
+            "construct": lambda: serializer(fields),
+            "serialize": record.serialize,
+            "deserialize": lambda: serializer.deserialize(data),
+        },
+        "dataclass": {
+            "create_class": lambda: make_dataclass(width, depth),
+            "construct": lambda: dataclass(**dc_fields),
+            "serialize": lambda: dataclasses.asdict(instance),
+            "deserialize": lambda: dataclass_from_dict(dataclass, data),
+        },
+        "dict": {
+            "construct": lambda: dict(data),
+            "serialize": lambda: copy_tree(data),
+            "deserialize": lambda: copy_tree(data),
+        },
+    }
+
+
+def batch_implementations(width, batch):
+    serializer = make_serializer(width, 0)
+    dataclass = make_dataclass(width, 0)
+    data = [make_data(width, 0) for _ in range(batch)]
+    records = serializer.deserialize_many(data)
+    instances = [dataclass(**item) for item in data]
+
+    return {
+        "serializer": {
+            "serialize_many": lambda: serializer.serialize_many(records),
+            "deserialize_many": lambda: serializer.deserialize_many(data),
+        },
+        "dataclass": {
+            "serialize_many": lambda: [dataclasses.asdict(obj) for obj in instances],
+            "deserialize_many": lambda: [dataclass(**item) for item in data],
+        },
+        "dict": {
+            "serialize_many": lambda: [dict(item) for item in data],
+            "deserialize_many": lambda: [dict(item) for item in data],
+        },
+    }
+
+
+def ops_per_sec(func, records, min_time):
+    # Число повторов подбирается так, чтобы один замер шёл около min_time
+    timer = timeit.Timer(func)
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time / 10:
+        number *= 10
+    number = max(1, round(number * min_time / elapsed))
+    best = min(timer.repeat(repeat=3, number=number))
+    return records * number / best
+
+
+def bytes_per_record(func, records):
+    # Одиночные операции повторяются, чтобы размазать накладные расходы
+    # самого замера; результаты держим живыми до снятия статистики
+    repeat = max(1, 1000 // records)
+    tracemalloc.start()
+    results = [func() for _ in range(repeat)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    total = records * repeat
+    return current / total, peak / total
+
+
+def measure(case, impls, records, min_time, with_memory):
+    results = []
+    for impl, ops in impls.items():
+        for op, func in ops.items():
+            result = {
+                "key": f"{case}/{impl}/{op}",
+                "case": case,
+                "impl": impl,
+                "op": op,
+                "records": records,
+                "ops_per_sec": ops_per_sec(func, records, min_time),
+            }
+            if with_memory and op != "create_class":
+                retained, peak = bytes_per_record(func, records)
+                result["bytes_retained"] = retained
+                result["bytes_peak"] = peak
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def print_result(result):
+    memory = ""
+    if "bytes_retained" in result:
+        memory = f"{result['bytes_retained']:>10.0f} {result['bytes_peak']:>10.0f}"
+    print(f"{result['key']:<48} {result['ops_per_sec']:>14,.0f} {memory}")
+
+
+def run_suite(profile, min_time, with_memory):
+    settings = PROFILES[profile]
+    print(f"{'Замер':<48} {'оп/с':>14} {'байт/зап':>10} {'пик':>10}")
+    print("-" * 85)
+
+    results = []
+    for width in settings["widths"]:
+        results += measure(
+            f"flat-{width}", implementations(width, 0), 1, min_time, with_memory
+        )
+    for depth in settings["depths"]:
+        results += measure(
+            f"nested-10x{depth}", implementations(10, depth), 1, min_time, with_memory
+        )
+    for batch in settings["batches"]:
+        # Пакеты меряются на плоской схеме из 10 полей
+        results += measure(
+            f"batch-{batch}",
+            batch_implementations(10, batch),
+            batch,
+            min_time,
+            with_memory and batch <= 100_000,
+        )
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    # Сравнивается только сериализатор: ориентиры нужны для контекста
+    previous = {result["key"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(result["key"])
+        if result["impl"] != "serializer" or before is None:
+            continue
+        ratio = result["ops_per_sec"] / before["ops_per_sec"]
+        if ratio < 1 - threshold:
+            regressions.append(
+                (result["key"], before["ops_per_sec"], result["ops_per_sec"], ratio)
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SerializerMeta benchmark suite")
+    parser.add_argument("--profile", choices=PROFILES, default="quick")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per sample"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="previous --json output to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="allowed slowdown against the baseline, 0.15 = 15%%",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.profile, args.min_time, not args.no_memory)
+    report = {
+        "python": sys.version,
+        "platform": platform.platform(),
+        "profile": args.profile,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        for key, before, after, ratio in regressions:
+            print(
+                f"Замедление {key}: {before:,.0f} -> {after:,.0f} оп/с ({ratio:.2f}x)"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
+import io
 import unittest
 
 from additional_task_serializer_meta import (
     BaseSerializer,
     SerializerAnnotationMismatchTypesError,
     SerializerAnnotationMissedError,
+    SerializerBatchError,
+    SerializerBinaryRangeError,
     SerializerCreationError,
     SerializerHeterogeneousCollectionsError,
     SerializerMeta,
@@ -179,6 +182,366 @@ class TestSerializer(unittest.TestCase):
         with self.assertRaises(SerializerMissingRequiredField):
             Outer.deserialize(data_outer)
 
+    def test_codegen_matches_generic(self):
+        def make(codegen):
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen):
+                username: str
+                active: bool = False
+                wallet: Wallet
+
+            return Wallet, User
+
+        data = {
+            "username": "me",
+            "active": True,
+            "wallet": {"uuid": 1, "balance": 10},
+        }
+        results = []
+        for codegen in (True, False):
+            Wallet, User = make(codegen)
+            user = User.deserialize(data)
+            results.append(user.serialize())
+
+            with self.assertRaises(SerializerAnnotationMismatchTypesError):
+                User(username=1, wallet=Wallet(uuid=1))
+            with self.assertRaises(SerializerMissingRequiredField) as ctx:
+                User.deserialize({"username": "me", "wallet": {}})
+            self.assertEqual(ctx.exception.log_path, "User")
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], {**data, "wallet": {"uuid": 1, "balance": 10}})
+
+    def test_slots_layout(self):
+        class Compact(BaseSerializer):
+            required: str
+            optional: int = 5
+
+        class Loose(BaseSerializer, slots=False):
+            required: str
+            optional: int = 5
+
+        compact = Compact(required="a")
+        self.assertFalse(hasattr(compact, "__dict__"))
+        self.assertEqual(Compact.__slots__, ("required", "optional"))
+        self.assertEqual(compact.optional, 5)
+        self.assertEqual(Compact._init_values, {"optional": 5})
+        with self.assertRaises(AttributeError):
+            compact.extra = 1
+
+        loose = Loose(required="a")
+        loose.extra = 1
+        self.assertEqual(Loose.optional, 5)
+        self.assertEqual(loose.serialize(), compact.serialize())
+
+    def test_batch_round_trip(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen):
+                username: str
+                wallet: Wallet
+
+            data = [
+                {"username": f"user{i}", "wallet": {"uuid": i, "balance": i}}
+                for i in range(5)
+            ]
+            users = User.deserialize_many(iter(data))
+            self.assertEqual(User.serialize_many(users), data)
+            self.assertEqual(
+                [user.serialize() for user in users],
+                [User.deserialize(item).serialize() for item in data],
+            )
+            self.assertEqual(User.deserialize_many([]), [])
+
+    def test_batch_fields_named_like_internals(self):
+        # Имена полей не должны пересекаться с именами в сгенерированном коде
+        for codegen in (True, False):
+
+            class Odd(BaseSerializer, codegen=codegen):
+                cls: int
+                new: bool
+                self: str
+                value_0: float = 0
+
+            data = [
+                {"cls": i, "new": True, "self": "x", "value_0": i} for i in range(3)
+            ]
+            records = Odd.deserialize_many(data)
+            self.assertEqual(Odd.serialize_many(records), data)
+            self.assertEqual(records[1].cls, 1)
+
+    def test_batch_reports_every_error(self):
+        class Wallet(BaseSerializer):
+            uuid: int
+
+        class User(BaseSerializer):
+            username: str
+            wallet: Wallet
+
+        data = [
+            {"username": "ok", "wallet": {"uuid": 1}},
+            {"username": 2, "wallet": {"uuid": 2}},
+            {"username": "ok", "wallet": {}},
+            {"wallet": {"uuid": "3"}},
+        ]
+        with self.assertRaises(SerializerBatchError) as ctx:
+            User.deserialize_many(data)
+
+        errors = [
+            (i, type(e), getattr(e, "attr_name", None) or e.field_name)
+            for i, e in ctx.exception.errors
+        ]
+        self.assertEqual(
+            errors,
+            [
+                (1, SerializerAnnotationMismatchTypesError, "username"),
+                (2, SerializerMissingRequiredField, "uuid"),
+                (3, SerializerMissingRequiredField, "username"),
+                (3, SerializerAnnotationMismatchTypesError, "uuid"),
+            ],
+        )
+        self.assertEqual(ctx.exception.errors[1][1].log_path, "User")
+
+    def test_json_round_trip(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen):
+                username: str
+                wallet: Wallet
+
+            user = User.from_json(b'{"username": "me", "wallet": {"uuid": 1}}')
+            self.assertEqual(user.wallet.balance, 0)
+            self.assertEqual(
+                user.to_json(), b'{"username":"me","wallet":{"uuid":1,"balance":0}}'
+            )
+
+            buffer = io.BytesIO()
+            User.write_jsonl(buffer, [user, User.from_json(user.to_json())])
+            self.assertEqual(buffer.getvalue().count(b"\n"), 2)
+
+            buffer.seek(0)
+            users = list(User.iter_jsonl(buffer))
+            self.assertEqual([u.serialize() for u in users], [user.serialize()] * 2)
+
+            with self.assertRaises(SerializerMissingRequiredField) as ctx:
+                next(User.iter_jsonl(['{"username": "me", "wallet": {}}\n']))
+            self.assertEqual(ctx.exception.log_path, "User")
+
+    def test_lazy_nested(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen, lazy=True):
+                username: str
+                wallet: Wallet
+
+            raw = {"uuid": 1}
+            user = User.deserialize({"username": "me", "wallet": raw})
+            self.assertIs(user._lazy_wallet, raw)
+            self.assertEqual(user.serialize(), {"username": "me", "wallet": raw})
+
+            wallet = user.wallet
+            self.assertIsInstance(wallet, Wallet)
+            self.assertIs(user.wallet, wallet)
+            self.assertEqual(wallet.balance, 0)
+            self.assertEqual(user.serialize()["wallet"], {"uuid": 1, "balance": 0})
+
+            broken = User.deserialize({"username": "me", "wallet": {}})
+            with self.assertRaises(SerializerMissingRequiredField) as ctx:
+                broken.wallet
+            self.assertEqual(ctx.exception.log_path, "User")
+
+            (batched,) = User.deserialize_many([{"username": "me", "wallet": raw}])
+            self.assertIs(batched._lazy_wallet, raw)
+            self.assertEqual(batched.wallet.uuid, 1)
+
+            with self.assertRaises(SerializerMissingRequiredField):
+                User.deserialize({"username": "me"})
+
+    def test_trusted_construct(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen):
+                username: str
+                wallet: Wallet
+
+            data = {"username": "me", "wallet": {"uuid": 1}}
+            user = User.deserialize(data, validate=False)
+            self.assertIsInstance(user.wallet, Wallet)
+            self.assertEqual(user.serialize(), User.deserialize(data).serialize())
+
+            wallet = Wallet.construct(uuid=2)
+            self.assertEqual(wallet.balance, 0)
+            self.assertIs(User.construct(username="me", wallet=wallet).wallet, wallet)
+
+            # Проверок нет вовсе: что передали, то и лежит в поле
+            self.assertEqual(Wallet.construct(uuid="2").uuid, "2")
+            self.assertEqual(
+                [u.serialize() for u in User.deserialize_many([data], validate=False)],
+                [user.serialize()],
+            )
+            with self.assertRaises(SerializerAnnotationMismatchTypesError):
+                User.deserialize({"username": 1, "wallet": {"uuid": 1}})
+
+    def test_construct_fields_named_like_internals(self):
+        for codegen in (True, False):
+            for track in (False, True):
+
+                class Odd(BaseSerializer, codegen=codegen, track=track):
+                    cls: int
+                    self: int = 7
+                    _new_instance: str = "x"
+
+                odd = Odd.construct(cls=1, self=5, _new_instance="y")
+                self.assertEqual((odd.cls, odd.self, odd._new_instance), (1, 5, "y"))
+                self.assertEqual(Odd.construct(cls=2).self, 7)
+
+                class Plain(BaseSerializer, codegen=codegen):
+                    self: int
+
+                self.assertEqual(Plain.construct(self=5).self, 5)
+
+                class Inner(BaseSerializer, codegen=codegen):
+                    value: int
+
+                class Shadowing(BaseSerializer, codegen=codegen, track=track):
+                    inner: Inner
+                    type: str
+                    dict: str = "d"
+
+                shadowing = Shadowing.construct(inner={"value": 3}, type="t")
+                self.assertIsInstance(shadowing.inner, Inner)
+                self.assertEqual(
+                    (shadowing.inner.value, shadowing.type, shadowing.dict),
+                    (3, "t", "d"),
+                )
+
+        class Odd(BaseSerializer):
+            cls: int
+
+        with self.assertRaises(TypeError):
+            Odd.construct(cls=1, other=2)
+
+    def test_binary_round_trip(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen):
+                uuid: int
+                balance: float = 0
+                frozen: bool = False
+
+            class User(BaseSerializer, codegen=codegen):
+                username: str
+                wallet: Wallet
+                note: str = "привет"
+
+            user = User.deserialize({"username": "me", "wallet": {"uuid": -5}})
+            data = user.to_bytes()
+            self.assertEqual(User.from_bytes(data).serialize(), user.serialize())
+            self.assertIsInstance(User.from_bytes(data).wallet.balance, float)
+
+            users = [user, User(username="", wallet=Wallet(uuid=2, frozen=True))]
+            packed = User.pack_many(users)
+            self.assertEqual(packed[: len(data)], data)
+            self.assertEqual(
+                [u.serialize() for u in User.unpack_many(memoryview(packed))],
+                [u.serialize() for u in users],
+            )
+            self.assertEqual(User.unpack_many(b""), [])
+
+            with self.assertRaises(ValueError):
+                User.unpack_many(packed[:-1])
+            with self.assertRaises(ValueError):
+                User.from_bytes(data + b"\0")
+
+    def test_binary_int_range(self):
+        for codegen in (True, False):
+
+            class Counter(BaseSerializer, codegen=codegen):
+                name: str
+                total: int
+
+            edge = Counter(name="max", total=2**63 - 1)
+            self.assertEqual(Counter.from_bytes(edge.to_bytes()).total, 2**63 - 1)
+            for total in (2**63, -(2**63) - 1):
+                with self.assertRaises(SerializerBinaryRangeError) as ctx:
+                    Counter.pack_many([edge, Counter(name="big", total=total)])
+                self.assertEqual(ctx.exception.attr_name, "total")
+
+    def test_binary_unsupported_field(self):
+        class Opaque(BaseSerializer):
+            payload: bytes
+
+        with self.assertRaises(TypeError):
+            Opaque(payload=b"x").to_bytes()
+
+    def test_change_tracking(self):
+        for codegen in (True, False):
+
+            class Wallet(BaseSerializer, codegen=codegen, track=True):
+                uuid: int
+                balance: float = 0
+
+            class User(BaseSerializer, codegen=codegen, track=True):
+                username: str
+                age: int = 0
+                wallet: Wallet
+
+            data = {"username": "me", "wallet": {"uuid": 1}}
+            user = User.deserialize(data)
+            self.assertEqual(user.serialize_changes(), {})
+
+            user.age = 30
+            user.wallet.balance = 5
+            patch = user.serialize_changes()
+            self.assertEqual(patch, {"age": 30, "wallet": {"balance": 5}})
+
+            replica = User.from_bytes(User.deserialize(data).to_bytes())
+            self.assertEqual(replica.serialize_changes(), {})
+            replica.apply_changes(patch)
+            self.assertEqual(replica.serialize(), user.serialize())
+
+            user.mark_clean()
+            self.assertEqual(user.serialize_changes(), {})
+            user.wallet = Wallet(uuid=2)
+            self.assertEqual(
+                user.serialize_changes(), {"wallet": {"uuid": 2, "balance": 0}}
+            )
+
+            before = replica.serialize()
+            with self.assertRaises(SerializerAnnotationMismatchTypesError):
+                replica.apply_changes({"age": 1, "wallet": {"uuid": "2"}})
+            self.assertEqual(replica.serialize(), before)
+            with self.assertRaises(SerializerAnnotationMissedError):
+                replica.apply_changes({"extra": 1})
+            with self.assertRaises(SerializerMissingRequiredField) as ctx:
+                replica.apply_changes({"wallet": {"uuid": None}})
+            self.assertEqual(ctx.exception.log_path, "User")
+
+        class Plain(BaseSerializer):
+            value: int
+
+        with self.assertRaises(TypeError):
+            Plain(value=1).serialize_changes()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,9 +2,18 @@ import csv
 import multiprocessing
 import random
 import time
+from array import array
+from collections import namedtuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from math import gcd, isqrt
 from multiprocessing import Pool, Process, Queue, cpu_count
 
+try:
+    import numpy as np
+except ImportError:  # numpy в зависимостях проекта, но модуль работает и без неё
+    np = None
+
 
 def generate_data(n):
     return [random.randint(2, 1000) for _ in range(n)]
@@ -27,6 +36,140 @@ def prime_factors_list(n):  # вайбкод
     return factors
 
 
+# Свидетели Миллера — Рабина, точные для n < 3.3 * 10^24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_probable_prime(n):
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+# Ро-метод Полларда (вариант Брента): находит какой-нибудь делитель
+# составного n, у которого нет маленьких простых множителей
+def pollard_rho(n):
+    if n % 2 == 0:
+        return 2
+    while True:
+        y, c, m = random.randrange(1, n), random.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+class SieveFactorizer:
+    # Таблица наименьших простых делителей (SPF) до bound: строится один
+    # раз, дальше разложение числа <= bound — проход по таблице за O(log n)
+    # делений. Числа больше bound делим на простые до trial_limit, остаток
+    # в пределах таблицы добираем по ней, а больший остаток без маленьких
+    # множителей — тестом Миллера — Рабина и ро-методом Полларда
+    def __init__(self, bound, trial_limit=10_000):
+        if bound < 2:
+            raise ValueError("bound must be at least 2")
+        self.bound = bound
+        self.spf = self._build(bound)
+        self.trial_primes = [
+            p for p in range(2, min(bound, trial_limit) + 1) if self.spf[p] == p
+        ]
+
+    @staticmethod
+    def _build(bound):
+        # Простые до sqrt(bound) решетом Эратосфена, затем для каждого из них
+        # по убыванию пишем p во все кратные начиная с p*p одним срезом:
+        # меньший простой записывается позже и остаётся в ячейке
+        spf = array("I", range(bound + 1))
+        root = isqrt(bound)
+        is_prime = bytearray([1]) * (root + 1)
+        for p in range(2, isqrt(root) + 1):
+            if is_prime[p]:
+                is_prime[p * p :: p] = bytes(len(range(p * p, root + 1, p)))
+        for p in range(root, 1, -1):
+            if is_prime[p]:
+                count = len(range(p * p, bound + 1, p))
+                spf[p * p :: p] = array("I", [p]) * count
+        return spf
+
+    def factors(self, n):
+        if n <= self.bound:
+            spf = self.spf
+            result = []
+            while n > 1:
+                p = spf[n]
+                result.append(p)
+                n //= p
+            return result
+        return self._factors_large(n)
+
+    def _factors_large(self, n):
+        result = []
+        for p in self.trial_primes:
+            if p * p > n:
+                break
+            while n % p == 0:
+                result.append(p)
+                n //= p
+            if n <= self.bound:
+                return result + self.factors(n)
+
+        limit = self.trial_primes[-1] + 1
+        if n < limit * limit or is_probable_prime(n):
+            # Нет делителей до limit — значит, n простое
+            result.append(n)
+            return result
+
+        divisor = pollard_rho(n)
+        result += self._factors_large(divisor) + self._factors_large(n // divisor)
+        return sorted(result)
+
+
+# Таблица процесса: строится в init_sieve (в пуле — инициализатором),
+# процессы после fork получают её готовой
+_sieve = None
+
+
+def init_sieve(bound):
+    global _sieve
+    if _sieve is None or _sieve.bound < bound:
+        _sieve = SieveFactorizer(bound)
+    return _sieve
+
+
 # Делаем разложение, но 1000 раз чтобы имитировать высокую нагрузку
 def process_number(n):
     res = []
@@ -35,11 +178,137 @@ def process_number(n):
     return res
 
 
+# Та же нагрузка, но разложение по таблице SPF
+def process_number_sieve(n):
+    factors = _sieve.factors
+    res = []
+    for _ in range(1000):
+        res = factors(n)
+    return res
+
+
+BACKENDS = {"trial": process_number, "sieve": process_number_sieve}
+
+
+# Разложения всех чисел одним плоским массивом: множители числа i лежат в
+# values[offsets[i] : offsets[i + 1]] по возрастанию
+RaggedFactors = namedtuple("RaggedFactors", ["offsets", "values"])
+
+
+# Дальше таблица SPF под весь массив слишком велика (4 байта на число),
+# и разложение идёт делением на простые до sqrt(max)
+SPF_TABLE_LIMIT = 10**7
+
+
+def factorize_array(numbers):
+    # Векторное разложение всего массива. Каждый шаг снимает с каждого ещё
+    # не разложенного числа по одному множителю, поэтому k-й шаг даёт k-й
+    # множитель числа. Разложенные числа из работы выбывают, а множители
+    # раскладываются по местам offsets[i] + k без сортировки
+    if np is None:
+        raise ImportError("factorize_array requires numpy")
+
+    remaining = np.array(numbers, dtype=np.int64)
+    top = int(remaining.max(initial=1))
+    if top <= SPF_TABLE_LIMIT:
+        steps = _spf_steps(remaining, top)
+    else:
+        steps = _trial_steps(remaining, top)
+
+    counts = np.zeros(remaining.size, dtype=np.int64)
+    for rows, positions, _ in steps:
+        counts[rows] = positions + 1
+    offsets = np.zeros(remaining.size + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    values = np.empty(offsets[-1], dtype=np.int64)
+    for rows, positions, factors in steps:
+        values[offsets[rows] + positions] = factors
+    return RaggedFactors(offsets, values)
+
+
+def _spf_steps(remaining, top):
+    # Таблица SieveFactorizer без копирования: один сбор spf[rem] и одно
+    # деление на шаг для всех активных чисел сразу
+    spf = np.frombuffer(init_sieve(max(top, 2)).spf, dtype=np.uint32)
+    rows = np.flatnonzero(remaining > 1)
+    rem = remaining[rows]
+    steps = []
+    step = 0
+    while rows.size:
+        factors = spf[rem]
+        steps.append((rows, step, factors))
+        rem //= factors
+        active = rem > 1
+        rows, rem = rows[active], rem[active]
+        step += 1
+    return steps
+
+
+def _trial_steps(remaining, top):
+    # Для каждого простого p до sqrt(max) маской делим на p все числа, что на
+    # него делятся, пока такие есть. Числа, у которых остаток меньше p*p,
+    # выбывают: их остаток — 1 или простое, он и будет последним множителем
+    limit = isqrt(top)
+    is_prime = np.ones(limit + 1, dtype=bool)
+    is_prime[:2] = False
+    for p in range(2, isqrt(limit) + 1):
+        if is_prime[p]:
+            is_prime[p * p :: p] = False
+
+    counts = np.zeros(remaining.size, dtype=np.int64)
+    active = np.flatnonzero(remaining > 1)
+    steps = []
+    for p in np.flatnonzero(is_prime).tolist():
+        active = active[remaining[active] >= p * p]
+        if not active.size:
+            break
+        hits = active[remaining[active] % p == 0]
+        while hits.size:
+            steps.append((hits, counts[hits], p))
+            counts[hits] += 1
+            remaining[hits] //= p
+            hits = hits[remaining[hits] % p == 0]
+
+    leftover = np.flatnonzero(remaining > 1)
+    steps.append((leftover, counts[leftover], remaining[leftover]))
+    return steps
+
+
+def ragged_to_lists(factors):
+    offsets, values = factors.offsets.tolist(), factors.values.tolist()
+    return [values[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+# Та же нагрузка (1000 разложений на число), но весь массив за раз
+def process_with_numpy(data, repeats=1000):
+    if np is None:
+        raise ImportError("process_with_numpy requires numpy")
+    numbers = np.array(data, dtype=np.int64)
+    for _ in range(repeats):
+        factors = factorize_array(numbers)
+    return list(zip(data, ragged_to_lists(factors)))
+
+
+# Функция на число для выбранного движка; для sieve заодно готовит таблицу
+# до bound (по умолчанию до максимума данных). Возвращает функцию и
+# инициализатор с аргументами для процессов-воркеров
+def select_backend(backend, data, bound=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {tuple(BACKENDS)}, got '{backend}'")
+    if backend == "trial":
+        return BACKENDS[backend], None, ()
+
+    bound = bound or max(max(data, default=2), 2)
+    init_sieve(bound)
+    return BACKENDS[backend], init_sieve, (bound,)
+
+
 # Для каждого числа вызываем "высокую нагрузку" на одном ядре и потоке
-def sequential_processing(data):
+def sequential_processing(data, backend="trial", bound=None):
+    func, _, _ = select_backend(backend, data, bound)
     results = []
     for num in data:
-        factors = process_number(num)
+        factors = func(num)
         results.append((num, factors))
     return results
 
@@ -47,12 +316,13 @@ def sequential_processing(data):
 # Для каждого числа поднимаем поток, в него передаём "высокую нагрузку"
 # Из-за GIL ожидаем что время будет больше, чем для линейного цикла, из-за
 # расходов на поднятие потока. Количество ограничено по количеству ядер
-def process_with_threadpool(data):
+def process_with_threadpool(data, backend="trial", bound=None):
+    func, _, _ = select_backend(backend, data, bound)
     results = []
     with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
         # Тут генерим словарь с потоками, если я правильно понял,
         # то они тут сразу запускаются из пула
-        future_to_num = {executor.submit(process_number, num): num for num in data}
+        future_to_num = {executor.submit(func, num): num for num in data}
         for future in as_completed(future_to_num):  # Ждём поток и возвращаем его
             num = future_to_num[future]  # Забрали число
 
@@ -71,25 +341,32 @@ def process_with_threadpool(data):
 # Пул процессов, ожидаем что работать будет быстрее на больших датасетаз
 # Поднять процесс тяжелее чем поток, на маленьких датасетах займёт больше
 # времени, чем если бы обрабатывали в одном процессе
-def process_with_processpool(data):
+# func — чем обрабатывать число, по умолчанию функция движка backend; должна
+# пиклиться по имени (функция уровня модуля), иначе пул её не передаст
+def process_with_processpool(data, func=None, backend="trial", bound=None):
+    backend_func, initializer, initargs = select_backend(backend, data, bound)
+    func = func or backend_func
     results = []
-    # Процессы по числу процессоров
-    with Pool(processes=cpu_count()) as pool:
+    # Процессы по числу процессоров, таблица SPF строится в каждом один раз
+    with Pool(
+        processes=cpu_count(), initializer=initializer, initargs=initargs
+    ) as pool:
         # Создаём процессы и ждём их выполнения (синхронно)
-        factors_list = pool.map(process_number, data)
+        factors_list = pool.map(func, data)
         for num, factors in zip(data, factors_list):
             results.append((num, factors))
     return results
 
 
-def worker(input_queue, output_queue):
+def worker(input_queue, output_queue, backend="trial", bound=None):
+    func, _, _ = select_backend(backend, (), bound)
     while True:
         try:
             task = input_queue.get(timeout=1)
             if task is None:
                 break
             num = task
-            factors = process_number(num)
+            factors = func(num)
             output_queue.put((num, factors))
         except Exception:
             break
@@ -98,7 +375,10 @@ def worker(input_queue, output_queue):
 # Ручное управление процессами, ожидаем что будет немного медленнее чем на
 # пуле процессов. Предпологаю из-за того, что каждый раз их поднимаем, а не
 # переиспользуем
-def process_with_manual_processes(data):
+def process_with_manual_processes(data, backend="trial", bound=None):
+    # Движок проверяем и границу таблицы считаем до запуска воркеров
+    _, _, initargs = select_backend(backend, data, bound)
+    bound = initargs[0] if initargs else None
     num_processes = cpu_count()
     input_queue = Queue()  # Отсюда берём
     output_queue = Queue()  # Сюда кладём
@@ -116,7 +396,7 @@ def process_with_manual_processes(data):
     # Запускаем процессы
     processes = []
     for _ in range(num_processes):
-        p = Process(target=worker, args=(input_queue, output_queue))
+        p = Process(target=worker, args=(input_queue, output_queue, backend, bound))
         p.start()
         processes.append(p)
 
@@ -148,7 +428,13 @@ def compare_performance(data):  # Вайбкод
         "ThreadPool": process_with_threadpool,
         "ProcessPool": process_with_processpool,
         "Ручные процессы": process_with_manual_processes,
+        "Последовательный SPF": partial(sequential_processing, backend="sieve"),
+        "ProcessPool SPF": partial(process_with_processpool, backend="sieve"),
     }
+    if np is not None:
+        methods["NumPy"] = process_with_numpy
+    else:
+        print("numpy не установлена, метод NumPy пропущен (uv sync)")
 
     results = {}
     timing_results = {}
@@ -182,6 +468,23 @@ def main():  # Вайбкод
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+
+    # Проход по таблице, деление сверх bound и Поллард на маленьких
+    # таблицах сверяем с наивным разложением
+    sieve = SieveFactorizer(1000)
+    assert all(sieve.factors(n) == prime_factors_list(n) for n in range(0, 1001))
+    assert all(sieve.factors(n) == prime_factors_list(n) for n in range(1001, 50_000))
+    small = SieveFactorizer(100, trial_limit=20)
+    for n in (101 * 103, 2**5 * 101 * 103, 997 * 991 * 983, 10_007**2, 7919 * 23):
+        assert small.factors(n) == prime_factors_list(n), n
+
+    sieve = SieveFactorizer(10**6)
+    for n in (999_983 * 999_979, 999_983**2, 2 * 3 * 999_979, 10**6 + 3):
+        assert sieve.factors(n) == prime_factors_list(n), n
+    big = (10**9 + 7) * (10**9 + 9)
+    assert sieve.factors(big * 12) == [2, 2, 3, 10**9 + 7, 10**9 + 9]
+    assert sieve.factors((2**61 - 1) * 3) == [3, 2**61 - 1]
+
     main()
 
 